@@ -9,11 +9,21 @@ for more details.
 #       moved to the second parameter position.
 
 import io
+import os
 import sys
+import time
+import asyncio
+import threading
+import weakref
+import collections
+import contextlib
+import multiprocessing
+import concurrent.futures
 import functools
 import itertools
 from collections.abc import Iterable
 from .orm import *
+from .orm import _SymbolSelect
 from .wrapper import WrapperMetaClass, init_wrapper
 #import clorm as orm
 
@@ -33,6 +43,10 @@ OControl=oclingo.Control
 
 from clingo import *
 __all__ = list([ k for k in oclingo.__dict__.keys() if k[0] != '_'])
+__all__.append('Assumptions')
+__all__.append('ModelCollector')
+__all__.append('BatchSolver')
+__all__.append('ControlPool')
 __version__ = oclingo.__version__
 
 # ------------------------------------------------------------------------------
@@ -106,6 +120,12 @@ class Model(OModel, metaclass=WrapperMetaClass):
            shown: select all atoms and terms (Default: False)
            raise_on_empty: raise a ValueError if the resulting FactBase is empty
                            (Default: False)
+           by_signature: select only the atoms that match the signatures of the
+                         unifier's predicates. This is an efficient alternative
+                         to ``atoms=True`` for models with many atoms that are
+                         not of interest, as the other atoms are never
+                         retrieved. It cannot be combined with the ``atoms``,
+                         ``terms``, and ``shown`` arguments (Default: False)
 
         '''
         nargs = list(args)
@@ -119,6 +139,7 @@ class Model(OModel, metaclass=WrapperMetaClass):
         if len(nargs) >= 5: raise_on_empty = nargs.pop(4)
         unifier = nkwargs.pop("unifier",None)
         if len(nargs) >= 1: unifier = nargs.pop(0)
+        by_signature = nkwargs.pop("by_signature",False)
 
         if unifier is not None: unifier=_build_unifier(unifier)
         else: unifier=self._unifier
@@ -127,11 +148,77 @@ class Model(OModel, metaclass=WrapperMetaClass):
                 "(no default was given at model instantiation)"
             raise ValueError(msg)
 
+        if by_signature:
+            if nargs or nkwargs:
+                raise TypeError(("facts() argument 'by_signature' cannot be "
+                                 "combined with the 'atoms', 'terms', or 'shown' "
+                                 "arguments"))
+            symbols = self._symbols_by_signature(unifier.predicates)
+        else:
+            symbols = self._wrapped.symbols(*nargs,**nkwargs)
+
         return unifier.unify(
-            symbols=self._wrapped.symbols(*nargs,**nkwargs),
+            symbols=symbols,
             raise_on_empty=raise_on_empty,
             delayed_init=True)
 
+    #------------------------------------------------------------------------------
+    # Return the atoms of the model that match the signatures of the predicates
+    # by looking up the symbolic atoms for each signature. Note: the model is
+    # only valid during the solve call so the list must be built immediately.
+    #------------------------------------------------------------------------------
+    def _symbols_by_signature(self, predicates):
+        sigs = []
+        for cls in predicates:
+            signs = [True, False] if cls.meta.sign is None else [cls.meta.sign]
+            for sign in signs:
+                sig = (cls.meta.name, cls.meta.arity, sign)
+                if sig not in sigs: sigs.append(sig)
+
+        symbols = []
+        for sig in sigs: symbols.extend(self._signature_symbols(*sig))
+        return symbols
+
+    # Generate the atoms of the model for a single signature
+    def _signature_symbols(self, name, arity, positive):
+        model = self._wrapped
+        for satom in model.context.symbolic_atoms.by_signature(name, arity, positive):
+            if model.contains(satom.symbol): yield satom.symbol
+
+    #------------------------------------------------------------------------------
+    # A query over the facts of a single predicate type in the model
+    #------------------------------------------------------------------------------
+    def select(self, ptype):
+        '''Return a query over the facts of a predicate type in the model.
+
+        Unlike ``facts()`` no ``FactBase`` is built. The query only looks at the
+        model's atoms with the signature of ``ptype`` and unifies them lazily,
+        so a query that stops early only pays for the atoms that it reads. The
+        query supports ``where()`` with the same comparison expressions (and
+        placeholders) as a ``FactBase`` select query, and is executed with
+        ``get()``, ``get_unique()``, ``first()``, ``count()``, or by iterating
+        over it. Note: the query must be executed while the model is valid.
+
+        .. code-block:: python
+
+            def on_model(model):
+                q = model.select(Assign).where(Assign.task == ph1_)
+                a = q.first("t1")
+
+        Args:
+          ptype: the predicate type to query
+
+        '''
+        if not isinstance(ptype, type) or not issubclass(ptype, Predicate):
+            raise TypeError("{} is not a subclass of Predicate".format(ptype))
+        signs = [True, False] if ptype.meta.sign is None else [ptype.meta.sign]
+        name, arity = ptype.meta.name, ptype.meta.arity
+
+        def symbols():
+            for sign in signs:
+                yield from self._signature_symbols(name, arity, sign)
+        return _SymbolSelect(ptype, symbols)
+
     #------------------------------------------------------------------------------
     # Overide contains
     #------------------------------------------------------------------------------
@@ -205,6 +292,7 @@ class SolveHandle(OSolveHandle, metaclass=WrapperMetaClass):
 # symbol-bool pairs.
 # ------------------------------------------------------------------------------
 def _expand_assumptions(assumptions):
+    if isinstance(assumptions, Assumptions): return assumptions.symbols()
     pos_assump = set()
     neg_assump = set()
 
@@ -233,6 +321,365 @@ def _expand_assumptions(assumptions):
     neg = [ (raw,False) for raw in neg_assump ]
     return list(itertools.chain(pos,neg))
 
+# ------------------------------------------------------------------------------
+# A precompiled set of solve assumptions
+# ------------------------------------------------------------------------------
+class Assumptions(object):
+    '''A precompiled list of assumptions for ``Control.solve()``.
+
+    When passing a list of assumptions to ``Control.solve()`` the list is
+    expanded on every call; walking any nested collections and converting each
+    ``Predicate`` instance to its raw symbol. An ``Assumptions`` object instead
+    stores the converted symbol-bool pairs so that it can be passed to
+    repeated solve calls without being re-expanded. Individual assumptions can
+    be added, changed, and removed in constant time.
+
+    Each symbol has a single truth value, so assigning a new truth value to an
+    existing assumption replaces the old value.
+
+    .. code-block:: python
+
+        assumptions = Assumptions([(fb, True)])
+        ctrl.solve(assumptions=assumptions)
+        assumptions.set(Item(3), False)
+        ctrl.solve(assumptions=assumptions)
+
+    Args:
+      assumptions: a list of arg-bool pairs in the same format as for
+        ``Control.solve()`` (Default: [])
+
+    '''
+
+    def __init__(self, assumptions=[]):
+        self._pairs = []
+        self._index = {}
+        self.update(assumptions)
+
+    @staticmethod
+    def _raw(fact):
+        return fact.raw if isinstance(fact, Predicate) else fact
+
+    def set(self, fact, truth=True):
+        '''Set the truth value of the assumption for a fact (or raw symbol)'''
+        raw = self._raw(fact)
+        pos = self._index.get(raw)
+        if pos is None:
+            self._index[raw] = len(self._pairs)
+            self._pairs.append((raw, bool(truth)))
+        else:
+            self._pairs[pos] = (raw, bool(truth))
+
+    def update(self, assumptions):
+        '''Set the assumptions from a list of arg-bool pairs'''
+        for raw, truth in _expand_assumptions(assumptions):
+            self.set(raw, truth)
+
+    def discard(self, fact):
+        '''Remove the assumption for a fact (or raw symbol) if it exists'''
+        raw = self._raw(fact)
+        pos = self._index.pop(raw, None)
+        if pos is None: return
+        last = self._pairs.pop()
+        if pos < len(self._pairs):
+            self._pairs[pos] = last
+            self._index[last[0]] = pos
+
+    def remove(self, fact):
+        '''Remove the assumption for a fact (or raw symbol)'''
+        if self._raw(fact) not in self._index:
+            raise KeyError("No assumption for '{}'".format(fact))
+        self.discard(fact)
+
+    def get(self, fact, default=None):
+        '''Return the truth value of the assumption for a fact (or raw symbol)'''
+        pos = self._index.get(self._raw(fact))
+        if pos is None: return default
+        return self._pairs[pos][1]
+
+    def symbols(self):
+        '''Return the list of symbol-bool pairs passed to the solver'''
+        return self._pairs
+
+    def clear(self):
+        '''Remove all assumptions'''
+        self._pairs = []
+        self._index = {}
+
+    def copy(self):
+        '''Return a copy of the assumptions'''
+        tmp = Assumptions()
+        tmp._pairs = list(self._pairs)
+        tmp._index = dict(self._index)
+        return tmp
+
+    def __contains__(self, fact):
+        return self._raw(fact) in self._index
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def __iter__(self):
+        return iter(list(self._pairs))
+
+# ------------------------------------------------------------------------------
+# The name of the solve() parameter for asynchronous solving depends on the
+# clingo version.
+# ------------------------------------------------------------------------------
+def _async_keyword():
+    if oclingo.__version__ > '5.3.1': return "async_"
+    return "async"
+
+# ------------------------------------------------------------------------------
+# An asynchronous iterator over the models of a solve call for use with
+# asyncio (see Control.models()). The solver runs in clingo's own thread and
+# the on_model callback passes each model to the event loop through a queue.
+# Since a model is only valid during the callback, the callback then blocks
+# until the next model is requested (or the iterator is closed).
+#
+# The callbacks do not reference the iterator itself, so an iterator that is
+# abandoned without being closed (eg. by breaking out of an "async for" loop)
+# can still be garbage collected. A finalizer then releases the blocked
+# callback and closes the solve handle so that the Control object is usable
+# again.
+# ------------------------------------------------------------------------------
+class _AsyncModels(object):
+    def __init__(self, control, assumptions):
+        self._control = control
+        self._assumptions = assumptions
+        self._handle = None
+        self._queue = None
+        self._resume = threading.Event()
+        self._closing = threading.Event()
+        self._finalizer = None
+        self._finished = False
+        self._result = None
+
+    @property
+    def result(self):
+        return self._result
+
+    @staticmethod
+    def _close(handle, resume, closing):
+        closing.set()
+        resume.set()
+        handle.cancel()
+        handle.__exit__(None, None, None)
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue = asyncio.Queue()
+        resume = self._resume
+        closing = self._closing
+
+        def on_model(model):
+            resume.clear()
+            loop.call_soon_threadsafe(queue.put_nowait, (model, None))
+            resume.wait()
+            return not closing.is_set()
+
+        def on_finish(result):
+            loop.call_soon_threadsafe(queue.put_nowait, (None, result))
+
+        kwargs = { "assumptions" : self._assumptions, "on_model" : on_model,
+                   "on_finish" : on_finish, _async_keyword() : True }
+        self._handle = self._control.solve(**kwargs)
+        self._finalizer = weakref.finalize(self, _AsyncModels._close,
+                                           self._handle, resume, closing)
+
+    # Close the solve handle (without blocking the event loop)
+    async def _finish(self):
+        self._finished = True
+        self._finalizer.detach()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _AsyncModels._close, self._handle,
+                                   self._resume, self._closing)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._finished: raise StopAsyncIteration
+        if self._handle is None: self._start()
+        else: self._resume.set()
+        model, result = await self._queue.get()
+        if model is None:
+            self._result = result
+            await self._finish()
+            raise StopAsyncIteration
+        return model
+
+    async def aclose(self):
+        if self._handle is None or self._finished: return
+        await self._finish()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.aclose()
+
+# ------------------------------------------------------------------------------
+# Generate the raw symbols for a collection of facts, where each fact can be a
+# clorm predicate instance, a clingo symbol, or a tuple of field values for the
+# given predicate type.
+# ------------------------------------------------------------------------------
+def _fact_symbols(facts, predicate=None):
+    for f in facts:
+        if isinstance(f, Predicate):
+            yield f.raw
+        elif isinstance(f, tuple):
+            if predicate is None:
+                raise TypeError(("Cannot add the tuple {} as a fact without a "
+                                 "predicate type").format(f))
+            yield predicate(*f).raw
+        else:
+            yield f
+
+# ------------------------------------------------------------------------------
+# A solve on_model callback that keeps the symbols of the last n models
+# ------------------------------------------------------------------------------
+class ModelCollector(object):
+    '''Collects the last models of a solve call for later unification.
+
+    A ``ModelCollector`` is passed as the ``on_model`` callback of
+    ``clorm.clingo.Control.solve()``. For each model it only keeps a copy of
+    the symbols together with the model's cost, number, and whether the model
+    is proven optimal. Furthermore, only the last ``n`` models are kept; which
+    for an optimisation problem are the best models found. Unification only
+    takes place when the facts of a collected model are requested (and is only
+    done once per model). This means that long optimisation runs use constant
+    memory and avoid unifying models that are superseded.
+
+    .. code-block:: python
+
+        collector = ModelCollector()
+        ctrl.solve(on_model=collector)
+        if collector: best = collector.facts()
+
+    Args:
+      n: the number of models to keep (Default: 1)
+      unifier: the unifier for the facts (Default: the unifier of the
+        ``Control`` object that it is passed to)
+      atoms: select all atoms in the model (Default: True)
+      terms: select all terms displayed with #show statements (Default: False)
+      shown: select all atoms and terms (Default: False)
+
+    '''
+
+    def __init__(self, n=1, unifier=None, atoms=True, terms=False, shown=False):
+        if n < 1: raise ValueError("Invalid number of models '{}'".format(n))
+        self._unifier = _build_unifier(unifier)
+        self._selection = { "atoms" : atoms, "terms" : terms, "shown" : shown }
+        self._models = collections.deque(maxlen=n)
+        self._facts = {}
+        self._count = 0
+
+    # Called by Control.solve() to provide the default unifier
+    def _set_default_unifier(self, unifier):
+        if self._unifier is None: self._unifier = unifier
+
+    def __call__(self, model):
+        symbols = list(model.symbols(**self._selection))
+        if len(self._models) == self._models.maxlen:
+            self._facts.pop(self._count - len(self._models), None)
+        self._models.append((symbols, model.cost, model.number,
+                             model.optimality_proven))
+        self._count += 1
+
+    def _index(self, idx):
+        num = len(self._models)
+        if idx < -num or idx >= num:
+            raise IndexError("ModelCollector index '{}' out of range".format(idx))
+        return idx % num
+
+    def facts(self, idx=-1, raise_on_empty=False):
+        '''Return the FactBase of a collected model (Default: the last model)'''
+        idx = self._index(idx)
+        key = self._count - len(self._models) + idx
+        fb = self._facts.get(key)
+        if fb is None:
+            if self._unifier is None:
+                raise ValueError(("Missing a predicate unifier specification "
+                                  "for the ModelCollector"))
+            fb = self._unifier.unify(symbols=self._models[idx][0],
+                                     raise_on_empty=raise_on_empty)
+            self._facts[key] = fb
+        return fb
+
+    def symbols(self, idx=-1):
+        '''Return the symbols of a collected model (Default: the last model)'''
+        return self._models[self._index(idx)][0]
+
+    def cost(self, idx=-1):
+        '''Return the cost of a collected model (Default: the last model)'''
+        return self._models[self._index(idx)][1]
+
+    def number(self, idx=-1):
+        '''Return the model number of a collected model (Default: the last model)'''
+        return self._models[self._index(idx)][2]
+
+    def optimality_proven(self, idx=-1):
+        '''Return whether a collected model is proven optimal (Default: the last model)'''
+        return self._models[self._index(idx)][3]
+
+    def clear(self):
+        '''Remove all collected models'''
+        self._models.clear()
+        self._facts.clear()
+
+    def __len__(self):
+        return len(self._models)
+
+    def __bool__(self):
+        return bool(self._models)
+
+# ------------------------------------------------------------------------------
+# The state of the facts that have been synchronised with a Control object (see
+# Control.sync_facts()). Each fact is represented by an external atom that is
+# either true, false, or has been released. If the facts were last synchronised
+# from a FactBase then a checkpoint is kept so that the next synchronisation
+# with the same FactBase only needs to look at the changes.
+# ------------------------------------------------------------------------------
+class _FactSync(object):
+    def __init__(self):
+        self.true = set()
+        self.false = set()
+        self.released = set()
+        self.parts = 0
+        self.factbase = None
+        self.checkpoint = None
+
+    # Return the raw symbols to set to true and false given the new facts
+    def changes(self, facts):
+        if facts is self.factbase:
+            try:
+                added, removed = facts.changes_since(self.checkpoint)
+                to_add = [ f.raw for f in itertools.chain(*added.values()) ]
+                to_remove = [ f.raw for f in itertools.chain(*removed.values()) ]
+                return ([ r for r in to_add if r not in self.true ],
+                        [ r for r in to_remove if r in self.true ])
+            except ValueError:
+                pass
+
+        raws = {}
+        for f in facts: raws[f.raw if isinstance(f,Predicate) else f] = None
+        return ([ r for r in raws if r not in self.true ],
+                [ r for r in self.true if r not in raws ])
+
+    # Remember the FactBase (if any) that was synchronised
+    def track(self, facts):
+        if self.factbase is not None:
+            try:
+                self.factbase.release_checkpoint(self.checkpoint)
+            except ValueError:
+                pass
+        if not isinstance(facts, FactBase):
+            self.factbase = None
+            self.checkpoint = None
+            return
+        self.factbase = facts
+        self.checkpoint = facts.checkpoint()
+
 # ------------------------------------------------------------------------------
 # Control class
 # ------------------------------------------------------------------------------
@@ -254,6 +701,8 @@ class Control(OControl, metaclass=WrapperMetaClass):
 
     def __init__(self, *args, **kwargs):
         self._unifier = None
+        self._sync = None
+        self._literals = {}
         if "unifier" in kwargs: self._unifier = _build_unifier(kwargs["unifier"])
 
         # Do we need to build a clingo.Control object or use an existing one. If
@@ -297,25 +746,61 @@ class Control(OControl, metaclass=WrapperMetaClass):
     #------------------------------------------------------------------------------
     # A new function to add facts from a factbase or a list of facts
     #------------------------------------------------------------------------------
-    def add_facts(self, facts):
+    def add_facts(self, facts, mode="ast", predicate=None, chunk_size=10000):
         '''Add facts to the control object. Note: facts must be added before grounding.
 
            This function can take an arbitrary collection containing a mixture
            of ``clorm.Predicate`` and ``clingo.Symbol`` objects. A
            ``clorm.FactBase`` is also a valid collection but it can only contain
-           ``clorm.Predicate`` instances.
+           ``clorm.Predicate`` instances. If a ``predicate`` is specified then
+           the collection can also contain tuples of the field values of that
+           predicate. The collection can be any iterable (such as a generator)
+           and is only traversed once, with each fact being converted and added
+           in turn, so the facts never need to be held in memory all at once.
+
+           The facts can be added in different ways (with different performance
+           characteristics) depending on the ``mode``:
+
+           - ``"ast"``: an Abstract Syntax Tree (AST) rule is built for each
+             fact and added to the "base" program part. This is the slowest
+             option.
+
+           - ``"string"``: the facts are rendered into program strings, each of
+             ``chunk_size`` facts, that are added to the "base" program part.
+             The facts are then treated identically to the ``"ast"`` mode, but
+             the cost of building an AST object for each fact is avoided.
+
+           - ``"backend"``: the facts are passed directly to the solver through
+             the clingo backend, bypassing the parser and the grounder
+             altogether. This is the fastest option. The facts are not part of
+             any program part, so they are added immediately (rather than when
+             the "base" part is grounded), but they are still visible to the
+             rules that are grounded afterwards.
 
         Args:
-          facts: a collection of ``clorm.Predicate`` or ``clingo.Symbol`` objects
+          facts: an iterable of ``clorm.Predicate`` or ``clingo.Symbol`` objects
+            (or tuples of field values)
+          mode: one of "ast", "string", or "backend" (Default: "ast")
+          predicate: the Predicate sub-class for any tuples of field values
+          chunk_size: the number of facts in each program string for the
+            "string" mode (Default: 10000)
 
         '''
-
-        # Facts are added by manually generating Abstract Syntax Tree (AST)
-        # elements for each fact and calling Control.add().
+        if chunk_size < 1:
+            raise ValueError("Invalid chunk_size '{}'".format(chunk_size))
+        raws = _fact_symbols(facts, predicate)
+        if mode == "ast": return self._add_facts_ast(raws)
+        if mode == "string": return self._add_facts_string(raws, chunk_size)
+        if mode == "backend": return self._add_facts_backend(raws)
+        raise ValueError(("Invalid add_facts() mode '{}': expecting 'ast', "
+                          "'string', or 'backend'").format(mode))
+
+    # Facts are added by manually generating Abstract Syntax Tree (AST) elements
+    # for each fact and calling Control.add().
+    def _add_facts_ast(self, raws):
         line = 1
         with self._wrapped.builder() as bldr:
-            for f in facts:
-                raw=f.raw if isinstance(f,Predicate) else f
+            for raw in raws:
                 floc = { "filename" : "<input>", "line" : line , "column" : 1 }
                 location = { "begin" : floc, "end" : floc }
                 r = ast.Rule(location,
@@ -324,18 +809,82 @@ class Control(OControl, metaclass=WrapperMetaClass):
                              [])
                 bldr.add(r)
                 line += 1
-        return
 
-#        # I THINK THE FOLLOWING IS ACTUALLY OK NOW - MAYBE THERE WERE SUBTLE ISSUES WITH
-#        # PREVIOUS VERSIONS OF CLINGO BUT THESE HAVE BEEN RESOLVED.
-#
-#        # DON'T USE BACKEND - COULD CAUSE UNEXPECTED INTERACTION BETWEEN GROUNDER AND SOLVER
-#        with self._wrapped.backend() as bknd:
-#            for f in facts:
-#                raw=f.raw if isinstance(f,Predicate) else f
-#                atm = bknd.add_atom(raw)
-#                bknd.add_rule([atm])
-#        return
+    # The string representation of a clingo symbol is valid ASP syntax so the
+    # facts can be added as program strings; one for each chunk of facts.
+    def _add_facts_string(self, raws, chunk_size):
+        while True:
+            chunk = [ str(raw) for raw in itertools.islice(raws, chunk_size) ]
+            if not chunk: return
+            chunk.append("")
+            self._wrapped.add("base", [], ".\n".join(chunk))
+
+    # Add each fact as an atom with a rule without a body.
+    def _add_facts_backend(self, raws):
+        with self._wrapped.backend() as bknd:
+            for raw in raws:
+                bknd.add_rule([bknd.add_atom(raw)])
+
+    #------------------------------------------------------------------------------
+    # Mirror a collection of facts into the control object using externals
+    #------------------------------------------------------------------------------
+    def sync_facts(self, facts, release=False):
+        '''Synchronise the facts held by the control object with a collection of facts.
+
+        Unlike ``add_facts()``, which adds facts permanently, the facts are
+        represented as external atoms. The first call adds all the facts, but
+        subsequent calls only change the control object to match the
+        differences: a new fact is declared (and grounded) as an external that
+        is assigned true, a fact that is no longer in the collection is
+        assigned false (or released if ``release`` is True), and a fact that
+        was previously assigned false is simply assigned true again. This allows
+        an evolving set of facts to be mirrored into a long-lived control object
+        with minimal grounding.
+
+        If ``facts`` is a ``FactBase`` then its change tracking is used (see
+        ``FactBase.checkpoint()``) so that the next synchronisation with the
+        same fact base only examines the facts that have changed. Note: this
+        releases the previous checkpoint taken by ``sync_facts()``.
+
+        As with any multi-shot solving, rules only see the facts that have been
+        synchronised before the rules are grounded.
+
+        Args:
+          facts: a collection of ``clorm.Predicate`` or ``clingo.Symbol`` objects
+          release: release the externals of removed facts instead of assigning
+            them false. A released fact cannot be synchronised again.
+
+        '''
+        sync = self._sync
+        if sync is None: sync = self._sync = _FactSync()
+        to_add, to_remove = sync.changes(facts)
+
+        for raw in to_add:
+            if raw in sync.released:
+                raise ValueError(("Cannot synchronise the previously released "
+                                  "external '{}'").format(raw))
+
+        # Declare and ground the externals for the new facts
+        new = [ raw for raw in to_add if raw not in sync.false ]
+        if new:
+            sync.parts += 1
+            name = "_clorm_sync_{}".format(sync.parts)
+            self._wrapped.add(name, [],
+                              "".join("#external {}.\n".format(raw) for raw in new))
+            self._wrapped.ground([(name, [])])
+
+        self.assign_externals(to_add, True)
+        for raw in to_add:
+            sync.false.discard(raw)
+            sync.true.add(raw)
+        if release:
+            self.release_externals(to_remove)
+            sync.released.update(to_remove)
+        else:
+            self.assign_externals(to_remove, False)
+            sync.false.update(to_remove)
+        sync.true.difference_update(to_remove)
+        sync.track(facts)
 
     #------------------------------------------------------------------------------
     # Overide assign_external to deal with Predicate object and a Clingo Symbol
@@ -385,6 +934,179 @@ class Control(OControl, metaclass=WrapperMetaClass):
         else:
             _release_fact(external)
 
+    #------------------------------------------------------------------------------
+    # Batch assignment and release of externals. Each fact is mapped to its
+    # program literal once (using the symbolic atoms) and the literals are
+    # cached so that repeatedly toggling the same externals avoids the symbol
+    # lookup.
+    #------------------------------------------------------------------------------
+    def _external_literal(self, fact):
+        if isinstance(fact, int): return fact
+        raw = fact.raw if isinstance(fact, Predicate) else fact
+        lit = self._literals.get(raw)
+        if lit is not None: return lit
+        atom = self._wrapped.symbolic_atoms[raw]
+        if atom is None or not atom.is_external: return None
+        self._literals[raw] = atom.literal
+        return atom.literal
+
+    def assign_externals(self, externals, truth=True):
+        '''Assign truth values to a batch of external facts.
+
+        ``externals`` is either a collection of facts, or a dict mapping each
+        fact to its truth value. A fact can be a raw clingo.Symbol object, a
+        clorm.Predicate instance, or a program literal (an int). Each fact is
+        only looked up once to find its program literal, so repeatedly assigning
+        the same externals is much faster than calling ``assign_external()``
+        for each fact. As with clingo, a fact that is not a grounded external is
+        ignored.
+
+        Args:
+          externals: a collection of facts or a dict of fact-truth value pairs
+          truth: the truth value for a collection of facts (Default: True)
+
+        '''
+        lookup = self._external_literal
+        assign = self._wrapped.assign_external
+        if isinstance(externals, dict): pairs = externals.items()
+        else: pairs = ((f, truth) for f in externals)
+        for fact, tval in pairs:
+            lit = lookup(fact)
+            if lit is not None: assign(lit, tval)
+
+    def release_externals(self, externals):
+        '''Release a batch of external facts (see ``assign_externals()``)'''
+        lookup = self._external_literal
+        release = self._wrapped.release_external
+        for fact in externals:
+            lit = lookup(fact)
+            if lit is None: continue
+            release(lit)
+            if not isinstance(fact, int):
+                self._literals.pop(fact.raw if isinstance(fact, Predicate) else fact, None)
+
+    #---------------------------------------------------------------------------
+    # Solving with asyncio
+    #---------------------------------------------------------------------------
+    async def solve_async(self, assumptions=[], on_model=None):
+        '''Run the solver from an asyncio coroutine without blocking the event loop.
+
+        The search is run asynchronously (in clingo's solving thread) and the
+        coroutine completes with the ``clingo.SolveResult`` when the search
+        finishes. If the coroutine is cancelled then the search is cancelled.
+
+        Args:
+          assumptions: as for ``solve()``
+          on_model: as for ``solve()``. Note: the callback is called from the
+            solving thread and not from the event loop.
+
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def set_result(result):
+            if not future.done(): future.set_result(result)
+
+        def on_finish(result):
+            loop.call_soon_threadsafe(set_result, result)
+
+        kwargs = { "assumptions" : assumptions, "on_model" : on_model,
+                   "on_finish" : on_finish, _async_keyword() : True }
+        handle = self.solve(**kwargs)
+        cancelled = False
+
+        # Cancelling and closing the handle wait for the search to stop so
+        # they are run outside of the event loop
+        def close():
+            if cancelled: handle.cancel()
+            handle.__exit__(None, None, None)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            await loop.run_in_executor(None, close)
+
+    def models(self, assumptions=[]):
+        '''Return an asynchronous iterator over the models of a solve call.
+
+        For use with asyncio, where ``async for`` iterates over the
+        ``clorm.clingo.Model`` objects of the search without blocking the event
+        loop. The search is suspended while each model is being processed, and
+        the model is only valid until the next model is requested. Once the
+        iteration is finished the ``result`` property of the iterator returns
+        the ``clingo.SolveResult``.
+
+        If the iteration is stopped early then the iterator should be closed
+        (with ``await it.aclose()``) to cancel the search. Using the iterator as
+        an asynchronous context manager does this automatically. Otherwise the
+        search is only cancelled (and the control object only becomes usable
+        again) once the iterator is garbage collected:
+
+        .. code-block:: python
+
+            async with ctrl.models() as it:
+                async for model in it:
+                    ...
+
+        Args:
+          assumptions: as for ``solve()``
+
+        '''
+        return _AsyncModels(self, assumptions)
+
+    #---------------------------------------------------------------------------
+    # Solve while unifying the facts of each model in the background
+    #---------------------------------------------------------------------------
+    def solve_unify(self, assumptions=[], executor=None, unifier=None,
+                    atoms=True, terms=False, shown=False):
+        '''Run the solver, unifying the facts of each model in the background.
+
+        Unifying the symbols of a model within an ``on_model`` callback stalls
+        the search, since the callback is run by the solver. Instead, the
+        callback here only copies the symbols of the model, and the unification
+        is performed by a separate worker thread (or the given executor) while
+        the search continues.
+
+        Returns a pair consisting of the ``clingo.SolveResult`` and a list of
+        ``concurrent.futures.Future`` objects (one for each model in the order
+        that they were found) that return the ``FactBase`` of each model.
+
+        Args:
+          assumptions: as for ``solve()``
+          executor: a ``concurrent.futures.Executor`` for performing the
+            unification (Default: a single worker thread)
+          unifier: the unifier for the facts (Default: the control object's
+            unifier)
+          atoms: select all atoms in the model (Default: True)
+          terms: select all terms displayed with #show statements (Default: False)
+          shown: select all atoms and terms (Default: False)
+
+        '''
+        unifier = _build_unifier(unifier) if unifier is not None else self._unifier
+        if unifier is None:
+            raise ValueError(("Missing a predicate unifier specification in "
+                              "function call (no default was given at control "
+                              "instantiation)"))
+
+        own_executor = executor is None
+        if own_executor:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        futures = []
+        def on_model(model):
+            symbols = model.symbols(atoms=atoms, terms=terms, shown=shown)
+            futures.append(executor.submit(unifier.unify, symbols))
+
+        try:
+            result = self._wrapped.solve(
+                assumptions=_expand_assumptions(assumptions), on_model=on_model)
+        finally:
+            if own_executor: executor.shutdown(wait=False)
+        return result, futures
+
     #---------------------------------------------------------------------------
     # Overide solve and if necessary replace on_model with a wrapper that
     # returns a clorm.Model object. Also because of the issue with using the
@@ -401,7 +1123,8 @@ class Control(OControl, metaclass=WrapperMetaClass):
         1) The ``assumptions`` argument is generalised so that in the list of
         argument-boolean pairs the argument can be be a clingo symbol, or clorm
         predicate instance, or a collection of clingo symbols or clorm
-        predicates.
+        predicates. Alternatively, a precompiled ``Assumptions`` object can be
+        passed to avoid expanding the list on every call.
 
         2) It produces either a ``clorm.clingo.SolveHandle`` wrapper object or a
         ``clorm.clingo.Model`` wrapper objects as appropriate (depending on the
@@ -412,8 +1135,7 @@ class Control(OControl, metaclass=WrapperMetaClass):
         # Build the list of valid arguments; using the correct "async" or
         # "async_" parameter based on the clingo version.  Note: "async" is a
         # keyword for Python 3.7+.
-        async_keyword="async"
-        if oclingo.__version__ > '5.3.1': async_keyword="async_"
+        async_keyword=_async_keyword()
 
         posnargs = ["assumptions","on_model","on_statistics",
                     "on_finish","yield_",async_keyword]
@@ -439,8 +1161,11 @@ class Control(OControl, metaclass=WrapperMetaClass):
         if "assumptions" in nkwargs and nkwargs["assumptions"] is not None:
             nkwargs["assumptions"] = _expand_assumptions(nkwargs["assumptions"])
 
-        # generate a new on_model function if necessary
-        if "on_model" in nkwargs and nkwargs["on_model"] is not None:
+        # generate a new on_model function if necessary. A ModelCollector is
+        # passed the clingo model directly as it doesn't need the wrapper.
+        if isinstance(nkwargs.get("on_model"), ModelCollector):
+            nkwargs["on_model"]._set_default_unifier(self._unifier)
+        elif "on_model" in nkwargs and nkwargs["on_model"] is not None:
             on_model=nkwargs["on_model"]
             @functools.wraps(on_model)
             def on_model_wrapper(model):
@@ -459,6 +1184,305 @@ class Control(OControl, metaclass=WrapperMetaClass):
             return result
 
 
+# ------------------------------------------------------------------------------
+# Solving many independent problem instances on a pool of worker processes.
+# Each job is shipped to a worker as plain strings (the program and the facts
+# as ASP text) and the worker returns the symbols of each model as strings, so
+# no clingo objects are pickled. The symbols are parsed and unified in the
+# parent process. Since clingo symbols are never freed, the worker processes
+# are recycled after a fixed number of jobs.
+# ------------------------------------------------------------------------------
+
+def _facts_asp_str(facts):
+    if facts is None: return ""
+    if isinstance(facts, str): return facts
+    return "".join("{}.\n".format(raw) for raw in _fact_symbols(facts))
+
+def _batch_solve(program, facts, control_args, selection):
+    ctrl = OControl(control_args)
+    ctrl.add("base", [], program)
+    if facts: ctrl.add("base", [], facts)
+    ctrl.ground([("base",[])])
+    models = []
+    def on_model(model):
+        models.append([ str(s) for s in model.symbols(**selection) ])
+    ctrl.solve(on_model=on_model)
+    return models
+
+class BatchSolver(object):
+    '''Solve many independent (program, facts) jobs on a pool of processes.
+
+    Each job is grounded and solved from scratch by a ``clingo.Control``
+    object in a worker process of a ``concurrent.futures.ProcessPoolExecutor``.
+    This avoids the GIL and, because each worker is replaced after
+    ``jobs_per_worker`` jobs, bounds the memory held by clingo symbols (which
+    are never freed by a process). From Python 3.11, with a start method other
+    than "fork", the workers are replaced using the executor's
+    ``max_tasks_per_child``. Otherwise the executor itself is replaced once it
+    has been given ``jobs_per_worker*max_workers`` jobs; in this case
+    ``submit()`` waits for the jobs of the old executor to finish so that
+    there are never more than ``max_workers`` worker processes. The facts are sent to the workers as ASP
+    text and the models are returned as strings that are unified in the
+    calling process. The result of each job is a list of FactBases, one per
+    model found (so an empty list means that the job is unsatisfiable).
+
+    .. code-block:: python
+
+        with BatchSolver(unifier=[Node,Edge,Colour]) as solver:
+            for models in solver.map((program, fb) for fb in instances):
+                ...
+
+    Args:
+      unifier: the unifier (or list of predicates) for the models
+      max_workers: the number of worker processes (Default: the number of CPUs)
+      jobs_per_worker: the (average) number of jobs a worker process runs
+        before it is replaced (Default: 100)
+      control_args: the arguments for each clingo Control object; for example
+        ``["0"]`` to find all models (Default: [])
+      atoms: select all atoms in the model (Default: True)
+      terms: select all terms displayed with #show statements (Default: False)
+      shown: select all atoms and terms (Default: False)
+      mp_context: the multiprocessing context for the process pool (Default:
+        None)
+
+    '''
+
+    def __init__(self, unifier, max_workers=None, jobs_per_worker=100,
+                 control_args=[], atoms=True, terms=False, shown=False,
+                 mp_context=None):
+        if jobs_per_worker < 1:
+            raise ValueError(("Invalid number of jobs per worker "
+                              "'{}'").format(jobs_per_worker))
+        self._unifier = _build_unifier(unifier)
+        if self._unifier is None:
+            raise ValueError("Missing a predicate unifier specification")
+        self._workers = max_workers if max_workers else (os.cpu_count() or 1)
+        self._jobs_per_worker = jobs_per_worker
+        self._control_args = list(control_args)
+        self._selection = { "atoms" : atoms, "terms" : terms, "shown" : shown }
+        self._mp_context = mp_context
+        self._executor = None
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+        # From Python 3.11 the executor can replace the workers itself, but
+        # not with the "fork" start method.
+        ctx = mp_context if mp_context else multiprocessing.get_context()
+        self._max_tasks_per_child = sys.version_info >= (3,11) and \
+            ctx.get_start_method() != "fork"
+
+    def _new_executor(self):
+        kwargs = { "max_workers" : self._workers }
+        if self._mp_context: kwargs["mp_context"] = self._mp_context
+        if self._max_tasks_per_child:
+            kwargs["max_tasks_per_child"] = self._jobs_per_worker
+        return concurrent.futures.ProcessPoolExecutor(**kwargs)
+
+    # Return the executor for the next job. Without max_tasks_per_child the
+    # workers are replaced by replacing the executor once it has been given its
+    # quota of jobs. To keep the number of worker processes bounded the old
+    # executor is drained (so this call blocks until its jobs have finished)
+    # before the new executor is started.
+    def _next_executor(self):
+        with self._lock:
+            if self._executor is not None and not self._max_tasks_per_child \
+               and self._submitted >= self._jobs_per_worker*self._workers:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._executor is None:
+                self._executor = self._new_executor()
+                self._submitted = 0
+            self._submitted += 1
+            return self._executor
+
+    def _unify(self, models):
+        return [ self._unifier.unify(
+            symbols=[ oclingo.parse_term(s) for s in model ])
+                 for model in models ]
+
+    def submit(self, program, facts=None):
+        '''Submit a job and return a ``concurrent.futures.Future`` for its models.
+
+        If the worker processes are due to be replaced then this call waits for
+        the previously submitted jobs to finish.
+
+        Args:
+          program: the ASP program as a string
+          facts: a FactBase, a collection of facts/raw symbols, or a string
+            of ASP facts (Default: None)
+        '''
+        facts = _facts_asp_str(facts)
+        future = concurrent.futures.Future()
+        wfuture = self._next_executor().submit(
+            _batch_solve, program, facts, self._control_args, self._selection)
+
+        def on_done(wfuture):
+            try:
+                future.set_result(self._unify(wfuture.result()))
+            except BaseException as e:
+                future.set_exception(e)
+
+        future.set_running_or_notify_cancel()
+        wfuture.add_done_callback(on_done)
+        return future
+
+    def map(self, jobs):
+        '''Solve the (program, facts) jobs and return their models in order'''
+        futures = [ self.submit(*job) for job in jobs ]
+        return (f.result() for f in futures)
+
+    def shutdown(self, wait=True):
+        '''Shutdown the worker processes'''
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None: executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.shutdown()
+        return False
+
+# ------------------------------------------------------------------------------
+# A pool of grounded Control objects. Each entry records when the control
+# object was created and its number of symbolic atoms at that time so that it
+# can be evicted when it becomes too old or has grown too much.
+# ------------------------------------------------------------------------------
+
+class _PoolEntry(object):
+    __slots__ = ('control', 'created', 'atoms', 'externals')
+
+    def __init__(self, control):
+        self.control = control
+        self.created = time.monotonic()
+        self.atoms = len(control.symbolic_atoms)
+        self.externals = []
+
+class ControlPool(object):
+    '''A pool of grounded ``Control`` objects that are reused across requests.
+
+    Grounding a large base program for every request is expensive. Instead a
+    ``ControlPool`` keeps the already grounded ``Control`` objects created by
+    ``factory`` and hands them out with ``checkout()``. The per-request facts
+    are passed as ``externals`` which are assigned true on checkout and reset
+    to false when the control object is returned with ``checkin()``. The
+    program must therefore declare the corresponding ``#external`` atoms.
+
+    A control object is evicted instead of being returned to the pool if it
+    is older than ``max_age`` seconds, or if its number of symbolic atoms has
+    grown by more than ``max_growth`` since it was created (for example, due
+    to calls to ``add_facts()`` and ``ground()`` between checkout and checkin).
+
+    .. code-block:: python
+
+        def factory():
+            ctrl = Control(unifier=[Edge,Colour])
+            ctrl.load("colouring.lp")
+            ctrl.ground([("base",[])])
+            return ctrl
+
+        pool = ControlPool(factory, max_age=600)
+        with pool.control(externals=fb) as ctrl:
+            ctrl.solve(on_model=on_model)
+
+    Args:
+      factory: a function that returns a new grounded ``Control`` object
+      max_idle: the maximum number of idle control objects kept (Default: None
+        means no limit)
+      max_age: the age in seconds after which a control object is evicted
+        (Default: None)
+      max_growth: the number of new symbolic atoms after which a control object
+        is evicted (Default: None)
+
+    '''
+
+    def __init__(self, factory, max_idle=None, max_age=None, max_growth=None):
+        if not callable(factory):
+            raise TypeError("ControlPool factory '{}' is not callable".format(factory))
+        self._factory = factory
+        self._max_idle = max_idle
+        self._max_age = max_age
+        self._max_growth = max_growth
+        self._idle = collections.deque()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, entry):
+        if self._max_age is not None and \
+           time.monotonic() - entry.created > self._max_age: return True
+        if self._max_growth is not None and \
+           len(entry.control.symbolic_atoms) - entry.atoms > self._max_growth:
+            return True
+        return False
+
+    def checkout(self, externals=None):
+        '''Return a grounded control object with the externals set to true.
+
+        Args:
+          externals: a collection of facts (or raw symbols) that are assigned
+            true until the control object is returned (Default: None)
+        '''
+        entry = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if not self._expired(candidate):
+                    entry = candidate
+                    break
+        if entry is None: entry = _PoolEntry(self._factory())
+
+        if externals is not None:
+            entry.externals = list(_fact_symbols(externals))
+            entry.control.assign_externals(entry.externals, True)
+        with self._lock:
+            self._active[id(entry.control)] = entry
+        return entry.control
+
+    def checkin(self, control):
+        '''Reset the externals of a checked out control object and return it to
+        the pool (or evict it).'''
+        with self._lock:
+            entry = self._active.pop(id(control), None)
+        if entry is None or entry.control is not control:
+            raise ValueError(("Control object '{}' was not checked out from "
+                              "this pool").format(control))
+        control.assign_externals(entry.externals, False)
+        entry.externals = []
+        if self._expired(entry): return
+        with self._lock:
+            if self._max_idle is None or len(self._idle) < self._max_idle:
+                self._idle.append(entry)
+
+    @contextlib.contextmanager
+    def control(self, externals=None):
+        '''A context manager to checkout a control object and then return it'''
+        ctrl = self.checkout(externals)
+        try:
+            yield ctrl
+        finally:
+            self.checkin(ctrl)
+
+    def solve(self, externals=None, assumptions=[], **kwargs):
+        '''Checkout a control object, solve, and return it to the pool.
+
+        The ``assumptions`` and remaining keyword arguments are passed to
+        ``Control.solve()``. Since the control object is returned after the
+        call, only synchronous solve calls are supported.
+        '''
+        with self.control(externals) as ctrl:
+            return ctrl.solve(assumptions=assumptions, **kwargs)
+
+    def clear(self):
+        '''Remove all idle control objects'''
+        with self._lock:
+            self._idle.clear()
+
+    def __len__(self):
+        '''Return the number of idle control objects'''
+        return len(self._idle)
+
 #------------------------------------------------------------------------------
 # This is probably bad practice... Modify the original clingo docstrings so that
 # when I generate the autodoc with clingo being mocked it installs a reference
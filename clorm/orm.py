@@ -14,6 +14,7 @@ import bisect
 import abc
 import functools
 import itertools
+import weakref
 import clingo
 import typing
 import re
@@ -58,10 +59,12 @@ __all__ = [
     'Predicate',
     'ComplexTerm',
     'FactBase',
+    'FrozenFactBase',
     'SymbolPredicateUnifier',
     'ContextBuilder',
     'Select',
     'Delete',
+    'Join',
     'TypeCastSignature',
     'refine_field',
     'combine_fields',
@@ -199,6 +202,37 @@ class _PredicatePathMeta(type):
         return super(_PredicatePathMeta, meta).__new__(meta, name, bases, dct)
 
 
+#------------------------------------------------------------------------------
+# Compile a function that returns the value of a path for a fact. Unlike
+# resolving the path by name it looks up the field values by position and does
+# not check the type of the fact, so it should only be used when the fact is
+# known to be of the correct type.
+# ------------------------------------------------------------------------------
+def _make_path_accessor(pathseq):
+    predicate = pathseq[0]
+    names = list(pathseq[1:])
+    sign = bool(names) and names[-1] == "sign"
+    if sign: names.pop()
+    indexes = []
+    for name in names:
+        fa = predicate.meta[name]
+        indexes.append(fa.index)
+        predicate = fa.defn.complex
+
+    if not sign:
+        if not indexes: return lambda fact: fact
+        if len(indexes) == 1:
+            idx = indexes[0]
+            return lambda fact: fact._field_values[idx]
+    elif not indexes:
+        return lambda fact: fact._raw.positive
+
+    def accessor(fact):
+        value = fact
+        for idx in indexes: value = value._field_values[idx]
+        return value._raw.positive if sign else value
+    return accessor
+
 class PredicatePath(object, metaclass=_PredicatePathMeta):
     '''PredicatePath implements the intuitive query syntax.
 
@@ -330,6 +364,15 @@ class PredicatePath(object, metaclass=_PredicatePathMeta):
         def subpaths(self):
             return self._parent._allsubpaths
 
+        #--------------------------------------------------------------------------
+        # A compiled (and unchecked) function to resolve the path wrt a fact
+        #--------------------------------------------------------------------------
+        @property
+        def accessor(self):
+            if self._parent._accessor is None:
+                self._parent._accessor = _make_path_accessor(self._parent._pathseq)
+            return self._parent._accessor
+
         #--------------------------------------------------------------------------
         # Functions that do something with the parent PredicatePath instance
         #--------------------------------------------------------------------------
@@ -365,6 +408,7 @@ class PredicatePath(object, metaclass=_PredicatePathMeta):
         self._allsubpaths = tuple([])
         self._field = self._get_field()
         self._hashable = PredicatePath.Hashable(self)
+        self._accessor = None
 
         if not pathseq or not inspect.isclass(pathseq[0]) or \
            not issubclass(pathseq[0], Predicate):
@@ -2279,6 +2323,12 @@ class PredicatePathComparator(Comparator):
         if isinstance(self._arg2, PredicatePath): tmp.add(self._arg2.meta.hashable)
         return tmp
 
+    @property
+    def compop(self): return self._compop
+
+    @property
+    def args(self): return (self._arg1, self._arg2)
+
     def indexable(self):
         if self._static: return None
         if isinstance(self._arg2, PredicatePath): return None
@@ -2397,6 +2447,7 @@ class _FactIndex(object):
             self._predicate = self._path.meta.predicate
             self._keylist = []
             self._key2values = {}
+            self._prefixcounts = None
         except:
             raise TypeError("{} is not a valid PredicatePath object".format(path))
 
@@ -2412,12 +2463,40 @@ class _FactIndex(object):
         # Index the fact by the key
         if key not in self._key2values: self._key2values[key] = set()
         self._key2values[key].add(fact)
+        self._prefixcounts = None
 
         # Maintain the sorted list of keys
         posn = bisect.bisect_left(self._keylist, key)
         if len(self._keylist) > posn and self._keylist[posn] == key: return
         bisect.insort_left(self._keylist, key)
 
+    # Add a collection of facts. Any new keys are merged into the sorted list of
+    # keys in one go rather than inserting them one at a time.
+    def add_all(self, facts):
+        accessor = self._path.meta.accessor
+        newkeys = []
+        for fact in facts:
+            if not isinstance(fact, self._predicate):
+                raise TypeError("{} is not a {}".format(fact, self._predicate))
+            key = accessor(fact)
+            values = self._key2values.get(key)
+            if values is None:
+                values = self._key2values[key] = set()
+                newkeys.append(key)
+            values.add(fact)
+        if newkeys:
+            self._keylist.extend(newkeys)
+            self._keylist.sort()
+        self._prefixcounts = None
+
+    # Copy the index structures directly (without re-indexing any facts)
+    def copy(self):
+        nfi = _FactIndex(self._path)
+        nfi._keylist = list(self._keylist)
+        nfi._key2values = { k: set(v) for k,v in self._key2values.items() }
+        nfi._prefixcounts = self._prefixcounts
+        return nfi
+
     def discard(self, fact):
         self.remove(fact, False)
 
@@ -2434,6 +2513,7 @@ class _FactIndex(object):
         values = self._key2values[key]
         if raise_on_missing: values.remove(fact)
         else: values.discard(fact)
+        self._prefixcounts = None
 
         # If still have values then we're done
         if values: return
@@ -2443,66 +2523,105 @@ class _FactIndex(object):
         posn = bisect.bisect_left(self._keylist, key)
         del self._keylist[posn]
 
+    # Remove a collection of facts. Rather than removing the emptied keys one at
+    # a time the sorted list of keys is compacted once at the end.
+    def discard_all(self, facts):
+        accessor = self._path.meta.accessor
+        emptied = False
+        for fact in facts:
+            key = accessor(fact)
+            values = self._key2values.get(key)
+            if values is None: continue
+            values.discard(fact)
+            if values: continue
+            del self._key2values[key]
+            emptied = True
+        if emptied:
+            self._keylist = [ k for k in self._keylist if k in self._key2values ]
+        self._prefixcounts = None
+
     def clear(self):
         self._keylist = []
         self._key2values = {}
+        self._prefixcounts = None
 
     @property
     def keys(self): return self._keylist
 
     #--------------------------------------------------------------------------
-    # Internal functions to get keys matching some boolean operator
+    # Internal function to get the positions (as a list of [start,end) ranges)
+    # of the sorted keys that match some boolean operator
     #--------------------------------------------------------------------------
 
-    def _keys_eq(self, key):
-        if key in self._key2values: return [key]
-        return []
+    def _key_ranges(self, op, key):
+        numkeys = len(self._keylist)
+        if op == operator.eq:
+            if key not in self._key2values: return []
+            posn = bisect.bisect_left(self._keylist, key)
+            return [(posn,posn+1)]
+        elif op == operator.ne:
+            posn1 = bisect.bisect_left(self._keylist, key)
+            posn2 = bisect.bisect_right(self._keylist, key)
+            return [(0,posn1),(posn2,numkeys)]
+        elif op == operator.lt:
+            return [(0,bisect.bisect_left(self._keylist, key))]
+        elif op == operator.le:
+            return [(0,bisect.bisect_right(self._keylist, key))]
+        elif op == operator.gt:
+            return [(bisect.bisect_right(self._keylist, key),numkeys)]
+        elif op == operator.ge:
+            return [(bisect.bisect_left(self._keylist, key),numkeys)]
+        raise ValueError("unsupported operator {}".format(op))
 
-    def _keys_ne(self, key):
-        posn1 = bisect.bisect_left(self._keylist, key)
-        if posn1: left =  self._keylist[:posn1]
-        else: left = []
-        posn2 = bisect.bisect_right(self._keylist, key)
-        if posn2: right = self._keylist[posn2:]
-        else: right = []
-        return left + right
-
-    def _keys_lt(self, key):
-        posn = bisect.bisect_left(self._keylist, key)
-        if posn: return self._keylist[:posn]
-        return []
-
-    def _keys_le(self, key):
-        posn = bisect.bisect_right(self._keylist, key)
-        if posn: return self._keylist[:posn]
-        return []
+    #--------------------------------------------------------------------------
+    # Find the keys (in sorted order) or the elements based on boolean match
+    # to a key
+    # --------------------------------------------------------------------------
+    def find_keys(self, op, key):
+        return [ k for (start,end) in self._key_ranges(op,key) \
+                 for k in self._keylist[start:end] ]
 
-    def _keys_gt(self, key):
-        posn = bisect.bisect_right(self._keylist, key)
-        if posn: return self._keylist[posn:]
-        return []
+    def find(self, op, key):
+        sets = [ self._key2values[k] for k in self.find_keys(op,key) ]
+        if not sets: return set()
+        return set.union(*sets)
 
-    def _keys_ge(self, key):
-        posn = bisect.bisect_left(self._keylist, key)
-        if posn: return self._keylist[posn:]
-        return []
+    def bucket(self, key):
+        return self._key2values.get(key, frozenset())
 
     #--------------------------------------------------------------------------
-    # Find elements based on boolean match to a key
+    # Count the elements that match a key without building the matching set.
+    # Uses a (lazily built) list of prefix sums over the sorted keys.
+    # --------------------------------------------------------------------------
+    def _count_range(self, start, end):
+        if start >= end: return 0
+        if self._prefixcounts is None:
+            self._prefixcounts = list(itertools.accumulate(
+                len(self._key2values[k]) for k in self._keylist))
+        total = self._prefixcounts[end-1]
+        if start: total -= self._prefixcounts[start-1]
+        return total
+
+    def count(self, op, key):
+        if op == operator.eq:
+            values = self._key2values.get(key)
+            return len(values) if values else 0
+        return sum(self._count_range(start,end) \
+                   for (start,end) in self._key_ranges(op,key))
+
     #--------------------------------------------------------------------------
-    def find(self, op, key):
-        keys = []
-        if op == operator.eq: keys = self._keys_eq(key)
-        elif op == operator.ne: keys = self._keys_ne(key)
-        elif op == operator.lt: keys = self._keys_lt(key)
-        elif op == operator.le: keys = self._keys_le(key)
-        elif op == operator.gt: keys = self._keys_gt(key)
-        elif op == operator.ge: keys = self._keys_ge(key)
-        else: raise ValueError("unsupported operator {}".format(op))
-
-        sets = [ self._key2values[k] for k in keys ]
-        if not sets: return set()
-        return set.union(*sets)
+    # The smallest/largest key that matches a key (raises a ValueError if there
+    # are no matches).
+    # --------------------------------------------------------------------------
+    def min_key(self, op, key):
+        for start,end in self._key_ranges(op,key):
+            if start < end: return self._keylist[start]
+        raise ValueError("No facts found - min() of an empty selection")
+
+    def max_key(self, op, key):
+        for start,end in reversed(self._key_ranges(op,key)):
+            if start < end: return self._keylist[end-1]
+        raise ValueError("No facts found - max() of an empty selection")
 
 #------------------------------------------------------------------------------
 # Select is an interface query over a FactBase.
@@ -2542,6 +2661,39 @@ class Select(abc.ABC):
         """Provide an ordering over the results."""
         pass
 
+    @abc.abstractmethod
+    def group_by(self, path):
+        """Group the results by the value of a field (or sub-field).
+
+        For a grouped query ``get()`` returns a dict that maps each value of
+        the field to the list of matching entries with that value. Similarly,
+        ``count()``, ``sum()``, ``min()``, and ``max()`` return a dict that maps
+        each value to the aggregate for that group. The groups are sorted by
+        the value of the field.
+
+        Args:
+          path: the field (or sub-field) to group by.
+
+        """
+        pass
+
+    @abc.abstractmethod
+    def project(self, *paths, distinct=False):
+        """Return tuples of field values instead of the matching facts.
+
+        After a projection ``get()`` (and ``get_unique()``) return tuples
+        containing the values of the specified fields (or sub-fields) of each
+        matching fact. If ``distinct`` is set then duplicate tuples are removed
+        (keeping the first occurrence) and ``count()`` returns the number of
+        distinct tuples.
+
+        Args:
+          paths: one or more fields (or sub-fields).
+          distinct: remove duplicate tuples (Default: False)
+
+        """
+        pass
+
     @abc.abstractmethod
     def get(self, *args, **kwargs):
         """Return all matching entries."""
@@ -2557,6 +2709,27 @@ class Select(abc.ABC):
         """Return the number of matching entries."""
         pass
 
+    @abc.abstractmethod
+    def sum(self, path, *args, **kwargs):
+        """Return the sum of a field's values over the matching entries."""
+        pass
+
+    @abc.abstractmethod
+    def min(self, path, *args, **kwargs):
+        """Return the smallest value of a field over the matching entries.
+
+        Raises ValueError if there are no matching entries.
+        """
+        pass
+
+    @abc.abstractmethod
+    def max(self, path, *args, **kwargs):
+        """Return the largest value of a field over the matching entries.
+
+        Raises ValueError if there are no matching entries.
+        """
+        pass
+
 #------------------------------------------------------------------------------
 # Delete is an interface to perform a query delete from a FactBase.
 # ------------------------------------------------------------------------------
@@ -2571,6 +2744,53 @@ class Delete(abc.ABC):
     def execute(self, *args, **kwargs):
         pass
 
+#------------------------------------------------------------------------------
+# Join is an interface to query over pairs of facts of two different predicate
+# types of a FactBase.
+# ------------------------------------------------------------------------------
+
+class Join(abc.ABC):
+
+    @abc.abstractmethod
+    def on(self, *expressions):
+        """Set the join condition.
+
+        The join condition consists of one or more equality comparisons between
+        a field of the first predicate and a field of the second predicate (eg.,
+        ``Assign.task == Task.id``). Multiple comparisons are treated as a
+        conjunction.
+
+        Args:
+          expressions: one or more equality comparison expressions.
+
+        """
+        pass
+
+    @abc.abstractmethod
+    def where(self, *expressions):
+        """Restrict the facts that are joined.
+
+        Each comparison expression must refer to the fields of only one of the
+        two joined predicates and is applied to the facts of that predicate
+        before they are joined. Placeholders are supported in the same way as
+        for ``Select.where()``.
+
+        Args:
+          expressions: one or more comparison expressions.
+
+        """
+        pass
+
+    @abc.abstractmethod
+    def get(self, *args, **kwargs):
+        """Return all matching pairs of facts."""
+        pass
+
+    @abc.abstractmethod
+    def count(self, *args, **kwargs):
+        """Return the number of matching pairs of facts."""
+        pass
+
 #------------------------------------------------------------------------------
 # Specification of an ordering over a field of a predicate/complex-term
 #------------------------------------------------------------------------------
@@ -2579,8 +2799,9 @@ class OrderBy(object):
         self._path = path
         self.asc = asc
     def compare(self, a,b):
-        va = self._path(a)
-        vb = self._path(b)
+        accessor = self._path.meta.accessor
+        va = accessor(a)
+        vb = accessor(b)
         if  va == vb: return 0
         if self.asc and va < vb: return -1
         if not self.asc and va > vb: return -1
@@ -2632,13 +2853,20 @@ def _check_where_clause(where, ptype):
 
 class _Select(Select):
 
+    # Sentinel for the min()/max() of an empty selection
+    _no_value = object()
+
     def __init__(self, factmap):
         self._factmap = factmap
         self._index_priority = { path.meta.hashable: idx \
                                  for (idx,path) in enumerate(factmap.indexes) }
         self._where = None
         self._indexable = None
+        self._index_only = False
         self._key = None
+        self._group = None
+        self._projection = None
+        self._distinct = False
 
     def where(self, *expressions):
         if self._where:
@@ -2652,6 +2880,11 @@ class _Select(Select):
 
         self._indexable = self._primary_search(self._where)
 
+        # If the where clause is a single comparison that is answered by the
+        # index then there is no need to test the facts returned by the index.
+        self._index_only = bool(self._indexable) and \
+            isinstance(self._where, PredicatePathComparator)
+
         # Check that the where clause only refers to the correct predicate
         _check_where_clause(self._where, self._factmap.predicate)
         return self
@@ -2674,13 +2907,7 @@ class _Select(Select):
             else: raise TypeError("Invalid 'order_by' expression: {}".format(exp))
 
         # Check that all the paths refer to the correct predicate type
-        ptype = self._factmap.predicate
-        for f in field_orders:
-            if f.path.meta.predicate != ptype:
-                msg = ("'order_by' expression contains path '{}' that doesn't match "
-                       "predicate type '{}'").format(f.path, ptype.__name__)
-                raise TypeError(msg)
-
+        for f in field_orders: self._check_path(f.path, "order_by")
 
         # Create a comparator function
         def mycmp(a, b):
@@ -2693,6 +2920,46 @@ class _Select(Select):
         self._key = functools.cmp_to_key(mycmp)
         return self
 
+    def group_by(self, path):
+        if self._group:
+            raise TypeError("cannot specify 'group_by' multiple times")
+        self._check_path(path, "group_by")
+        self._group = path
+        return self
+
+    def project(self, *paths, distinct=False):
+        if self._projection:
+            raise TypeError("cannot specify 'project' multiple times")
+        if not paths:
+            raise TypeError("empty 'project' expression")
+        for p in paths: self._check_path(p, "project")
+        accessors = tuple(p.meta.accessor for p in paths)
+        self._projection = lambda f: tuple(a(f) for a in accessors)
+        self._distinct = bool(distinct)
+        return self
+
+    # Apply any projection to a list of facts
+    def _project(self, facts):
+        if not self._projection: return facts
+        result = list(map(self._projection, facts))
+        if self._distinct: return list(dict.fromkeys(result))
+        return result
+
+    # Check that a path used in a clause refers to the correct predicate type
+    def _check_path(self, path, clause):
+        if not isinstance(path, PredicatePath):
+            raise TypeError("Invalid '{}' expression: {}".format(clause, path))
+        ptype = self._factmap.predicate
+        if path.meta.predicate != ptype:
+            msg = ("'{}' expression contains path '{}' that doesn't match "
+                   "predicate type '{}'").format(clause, path, ptype.__name__)
+            raise TypeError(msg)
+
+    # Return the fact index for a path (or None if the path is not indexed)
+    def _factindex(self, path):
+        if path.meta.hashable not in self._index_priority: return None
+        return self._factmap.get_factindex(path)
+
     def _primary_search(self, where):
         def validate_indexable(indexable):
             if not indexable: return None
@@ -2743,38 +3010,71 @@ class _Select(Select):
         new_kwargs.update(kwargs)
         return new_kwargs
 
+    # Return the fact index and the key value (resolving any placeholder) for
+    # the primary search.
+    def _index_lookup(self, args, nkwargs):
+        findex = self._factmap.get_factindex(self._indexable[0])
+        value = self._indexable[2]
+        if isinstance(value, _PositionalPlaceholder): value = args[value.posn]
+        elif isinstance(value, _NamedPlaceholder): value = nkwargs[value.name]
+        field = findex.path.meta.field
+        if field:
+            cmplx = field.complex
+            if cmplx and isinstance(value, tuple): value = cmplx(*value)
+        return findex, value
+
+    # Generate the (unsorted) facts matching the where clause. If there is no
+    # index test all instances else use the index
+    def _matching(self, args, nkwargs):
+        if not self._indexable:
+            if not self._where: return iter(self._factmap.facts())
+            return (f for f in self._factmap.facts() \
+                    if self._where(f,*args,**nkwargs))
+
+        findex, value = self._index_lookup(args, nkwargs)
+        facts = findex.find(self._indexable[1], value)
+        if self._index_only: return iter(facts)
+        return (f for f in facts if self._where(f,*args,**nkwargs))
+
+    # Generate the (key, facts) pairs for a grouped query, in key order. If the
+    # group path is indexed then the index buckets can be used directly.
+    def _groups(self, args, nkwargs):
+        findex = self._factindex(self._group)
+        if findex:
+            if not self._where:
+                return [ (k, findex.bucket(k)) for k in findex.keys ]
+            if self._index_only and \
+               self._indexable[0].meta.hashable == self._group.meta.hashable:
+                _, value = self._index_lookup(args, nkwargs)
+                keys = findex.find_keys(self._indexable[1], value)
+                return [ (k, findex.bucket(k)) for k in keys ]
+
+        groups = {}
+        accessor = self._group.meta.accessor
+        for f in self._matching(args, nkwargs):
+            groups.setdefault(accessor(f), []).append(f)
+        return sorted(groups.items(), key=operator.itemgetter(0))
+
     # Function to execute the select statement
     def get(self, *args, **kwargs):
-
         nkwargs = self._resolve_arguments(*args, **kwargs)
+        if self._group:
+            result = {}
+            for k, facts in self._groups(args, nkwargs):
+                facts = list(facts)
+                if self._key: facts.sort(key=self._key)
+                result[k] = self._project(facts)
+            return result
 
-        # Function to get a value - resolving placeholder if necessary
-        def get_value(arg):
-            if isinstance(arg, _PositionalPlaceholder): return args[arg.posn]
-            elif isinstance(arg, _NamedPlaceholder): return nkwargs[arg.name]
-            else: return arg
+        result = list(self._matching(args, nkwargs))
 
-        # If there is no index test all instances else use the index
-        result = []
-        if not self._indexable:
-            for f in self._factmap.facts():
-                if not self._where: result.append(f)
-                elif self._where and self._where(f,*args,**nkwargs): result.append(f)
-        else:
-            findex = self._factmap.get_factindex(self._indexable[0])
-            value = get_value(self._indexable[2])
-            field = findex.path.meta.field
-            if field:
-                cmplx = field.complex
-                if cmplx and isinstance(value, tuple): value = cmplx(*value)
-            for f in findex.find(self._indexable[1], value):
-                if self._where(f,*args,**nkwargs): result.append(f)
-
-        # Return the results - sorted if necessary
+        # Return the results - sorted and projected if necessary
         if self._key: result.sort(key=self._key)
-        return result
+        return self._project(result)
 
     def get_unique(self, *args, **kwargs):
+        if self._group:
+            raise TypeError("cannot call 'get_unique' on a 'group_by' query")
         count=0
         fact=None
         for f in self.get(*args, **kwargs):
@@ -2786,12 +3086,70 @@ class _Select(Select):
             raise ValueError("No facts found - exactly one expected")
         return fact
 
+    # Count the matching facts. Where possible the count is calculated directly
+    # from the fact index (or the fact map) without materialising any facts.
     def count(self, *args, **kwargs):
-        return len(self.get(*args, **kwargs))
+        if self._distinct:
+            result = self.get(*args, **kwargs)
+            if self._group: return { k: len(v) for k, v in result.items() }
+            return len(result)
+        if self._group:
+            nkwargs = self._resolve_arguments(*args, **kwargs)
+            return { k: len(facts) for k, facts in self._groups(args, nkwargs) }
+        if not self._where: return len(self._factmap)
+        nkwargs = self._resolve_arguments(*args, **kwargs)
+        if self._index_only:
+            findex, value = self._index_lookup(args, nkwargs)
+            return findex.count(self._indexable[1], value)
+        return sum(1 for f in self._matching(args, nkwargs))
+
+    # Apply an aggregate function to the values of a path over the matching
+    # facts (or over each group of matching facts).
+    def _aggregate(self, name, aggfn, path, args, kwargs):
+        self._check_path(path, name)
+        nkwargs = self._resolve_arguments(*args, **kwargs)
+        accessor = path.meta.accessor
+        if self._group:
+            return { k: aggfn(map(accessor, facts)) \
+                     for k, facts in self._groups(args, nkwargs) }
+        return aggfn(map(accessor, self._matching(args, nkwargs)))
+
+    # The min/max of an indexed path can be read off the sorted index keys as
+    # long as the where clause (if any) is answered by that same index.
+    def _extremum(self, name, aggfn, path, args, kwargs):
+        def safe_aggfn(values):
+            result = aggfn(values, default=_Select._no_value)
+            if result is _Select._no_value:
+                raise ValueError(("No facts found - {}() of an empty "
+                                  "selection").format(name))
+            return result
+
+        self._check_path(path, name)
+        findex = self._factindex(path)
+        if self._group or not findex:
+            return self._aggregate(name, safe_aggfn, path, args, kwargs)
+        if not self._where:
+            return safe_aggfn(findex.keys[:1] if name == "min" else findex.keys[-1:])
+        if self._index_only and \
+           self._indexable[0].meta.hashable == path.meta.hashable:
+            nkwargs = self._resolve_arguments(*args, **kwargs)
+            _, value = self._index_lookup(args, nkwargs)
+            if name == "min": return findex.min_key(self._indexable[1], value)
+            return findex.max_key(self._indexable[1], value)
+        return self._aggregate(name, safe_aggfn, path, args, kwargs)
+
+    def sum(self, path, *args, **kwargs):
+        return self._aggregate("sum", sum, path, args, kwargs)
+
+    def min(self, path, *args, **kwargs):
+        return self._extremum("min", min, path, args, kwargs)
+
+    def max(self, path, *args, **kwargs):
+        return self._extremum("max", max, path, args, kwargs)
 
 #------------------------------------------------------------------------------
-# A deletion over a _FactMap
-# - a stupid implementation that iterates over all facts and indexes
+# A deletion over a _FactMap - the matching facts are removed in bulk so that
+# each index is only updated once.
 #------------------------------------------------------------------------------
 
 class _Delete(Delete):
@@ -2811,11 +3169,204 @@ class _Delete(Delete):
             self._factmap.clear()
             return num_deleted
 
-        # Gather all the facts to delete and remove them
-        to_delete = [ f for f in self._select.get(*args, **kwargs) ]
-        for fact in to_delete: self._factmap.remove(fact)
+        # Gather all the facts to delete (no need to sort them) and remove them
+        # in bulk
+        nkwargs = self._select._resolve_arguments(*args, **kwargs)
+        to_delete = list(self._select._matching(args, nkwargs))
+        self._factmap.discard_all(to_delete)
         return len(to_delete)
 
+#------------------------------------------------------------------------------
+# A selection over a stream of raw symbols for a single predicate type (for
+# example, the atoms of a clingo model). The symbols are only unified as the
+# query consumes them so a query that stops early (eg. first() or get_unique())
+# never unifies the remaining symbols. As with _Delete, the where clause is
+# handled by a _Select (over an empty _FactMap).
+# ------------------------------------------------------------------------------
+
+class _SymbolSelect(object):
+
+    def __init__(self, ptype, symbols):
+        self._ptype = ptype
+        self._symbols = symbols
+        self._select = _Select(_FactMap(ptype))
+
+    def where(self, *expressions):
+        """Set the where clause (see ``Select.where()``)."""
+        self._select.where(*expressions)
+        return self
+
+    def _matching(self, args, kwargs):
+        nkwargs = self._select._resolve_arguments(*args, **kwargs)
+        where = self._select._where
+        facts = _unify([self._ptype], self._symbols())
+        if not where: return facts
+        return (f for f in facts if where(f,*args,**nkwargs))
+
+    def get(self, *args, **kwargs):
+        """Return all matching facts."""
+        return list(self._matching(args, kwargs))
+
+    def get_unique(self, *args, **kwargs):
+        """Return the single matching fact. Raises ValueError otherwise."""
+        matching = self._matching(args, kwargs)
+        fact = next(matching, None)
+        if fact is None:
+            raise ValueError("No facts found - exactly one expected")
+        if next(matching, None) is not None:
+            raise ValueError("Multiple facts found - exactly one expected")
+        return fact
+
+    def first(self, *args, **kwargs):
+        """Return the first matching fact (or None if there is no match)."""
+        return next(self._matching(args, kwargs), None)
+
+    def count(self, *args, **kwargs):
+        """Return the number of matching facts."""
+        return sum(1 for f in self._matching(args, kwargs))
+
+    def __iter__(self):
+        return self._matching((), {})
+
+#------------------------------------------------------------------------------
+# An (equi-)join over two _FactMaps - executed as a hash join. Where possible an
+# existing fact index on the join key is used as the hash table, otherwise the
+# hash table is built from the side with the fewest facts.
+# ------------------------------------------------------------------------------
+
+class _Join(Join):
+
+    def __init__(self, factmap1, factmap2):
+        if factmap1.predicate == factmap2.predicate:
+            raise TypeError(("cannot join predicate type '{}' with "
+                             "itself").format(factmap1.predicate.__name__))
+        self._factmaps = (factmap1, factmap2)
+        self._selects = [None, None]
+        self._keypaths = None
+
+    # Return the side (0 or 1) of the join that a path refers to
+    def _side(self, path, clause):
+        ptype = path.meta.predicate
+        for side, fm in enumerate(self._factmaps):
+            if fm.predicate == ptype: return side
+        msg = ("'{}' expression contains path '{}' that doesn't match "
+               "predicate types '{}' or '{}'").format(
+                   clause, path, self._factmaps[0].predicate.__name__,
+                   self._factmaps[1].predicate.__name__)
+        raise TypeError(msg)
+
+    def on(self, *expressions):
+        if self._keypaths:
+            raise TypeError("cannot specify 'on' multiple times")
+        if not expressions:
+            raise TypeError("empty 'on' expression")
+
+        keypaths = ([],[])
+        for exp in expressions:
+            if not isinstance(exp, PredicatePathComparator) or \
+               exp.compop != operator.eq or \
+               not isinstance(exp.args[1], PredicatePath):
+                raise TypeError(("Invalid 'on' expression '{}': expecting an "
+                                 "equality between fields").format(exp))
+            path1, path2 = exp.args
+            side1 = self._side(path1, "on")
+            side2 = self._side(path2, "on")
+            if side1 == side2:
+                raise TypeError(("Invalid 'on' expression '{}': the fields must "
+                                 "be from different predicates").format(exp))
+            keypaths[side1].append(path1)
+            keypaths[side2].append(path2)
+        self._keypaths = keypaths
+        return self
+
+    def where(self, *expressions):
+        if self._selects[0] or self._selects[1]:
+            raise TypeError("cannot specify 'where' multiple times")
+        if not expressions:
+            raise TypeError("empty 'where' expression")
+
+        sideexps = ([],[])
+        for exp in expressions:
+            if not isinstance(exp, Comparator) or not exp.hashable_paths():
+                raise TypeError(("Invalid 'where' expression '{}': a join can "
+                                 "only be restricted by field "
+                                 "comparisons").format(exp))
+            sides = set(self._side(hp.path, "where") for hp in exp.hashable_paths())
+            if len(sides) != 1:
+                raise TypeError(("Invalid 'where' expression '{}': refers to "
+                                 "both joined predicates").format(exp))
+            sideexps[sides.pop()].append(exp)
+
+        for side, exps in enumerate(sideexps):
+            if exps: self._selects[side] = self._factmaps[side].select().where(*exps)
+        return self
+
+    # The key function for a side of the join
+    def _keyfn(self, side):
+        accessors = tuple(p.meta.accessor for p in self._keypaths[side])
+        if len(accessors) == 1: return accessors[0]
+        return lambda f: tuple(a(f) for a in accessors)
+
+    # The facts for a side of the join (after applying any where clause)
+    def _facts(self, side, args, kwargs):
+        if self._selects[side]: return self._selects[side].get(*args, **kwargs)
+        return self._factmaps[side].facts()
+
+    # Generate the pairs of joined facts
+    def _execute(self, args, kwargs):
+        if not self._keypaths:
+            raise TypeError("missing 'on' expression for join")
+
+        # Look for an existing index on the join key of a side that has no
+        # where clause. If both sides have one then use the larger side.
+        indexed = []
+        for side, fm in enumerate(self._factmaps):
+            paths = self._keypaths[side]
+            if len(paths) != 1 or self._selects[side]: continue
+            if paths[0].meta.hashable not in set(p.meta.hashable for p in fm.indexes):
+                continue
+            indexed.append(side)
+
+        if indexed:
+            build = max(indexed, key=lambda side: len(self._factmaps[side]))
+            lookup = self._factmaps[build].get_factindex(self._keypaths[build][0]).bucket
+            probefacts = self._facts(1-build, args, kwargs)
+        else:
+            facts = [ self._facts(side, args, kwargs) for side in (0,1) ]
+            build = 0 if len(facts[0]) <= len(facts[1]) else 1
+            keyfn = self._keyfn(build)
+            table = {}
+            for f in facts[build]: table.setdefault(keyfn(f), []).append(f)
+            lookup = lambda key: table.get(key, ())
+            probefacts = facts[1-build]
+
+        probekeyfn = self._keyfn(1-build)
+        for pf in probefacts:
+            for bf in lookup(probekeyfn(pf)):
+                yield (bf, pf) if build == 0 else (pf, bf)
+
+    def get(self, *args, **kwargs):
+        return list(self._execute(args, kwargs))
+
+    def count(self, *args, **kwargs):
+        return sum(1 for _ in self._execute(args, kwargs))
+
+#------------------------------------------------------------------------------
+# An order independent digest of a set of facts is maintained as the sum (modulo
+# 2^64) of the mixed hashes of the facts. Facts can be added and removed from
+# the digest in O(1).
+# ------------------------------------------------------------------------------
+
+_HASH_MASK = (1 << 64) - 1
+
+# Spread the bits of a fact's hash (the splitmix64 finaliser) so that summing
+# the hashes of a set of facts doesn't easily lead to collisions.
+def _mix_hash(fact):
+    h = hash(fact) & _HASH_MASK
+    h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & _HASH_MASK
+    h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & _HASH_MASK
+    return h ^ (h >> 31)
+
 #------------------------------------------------------------------------------
 # A helper function to determine if two collections have the same elements
 # (irrespective of ordering). This is useful if the underlying objects are two
@@ -2842,6 +3393,10 @@ class _FactMap(object):
 
         self._findexes = None
         self._indexes = ()
+        self._shared = None
+        self._unshare = None
+        self._digest = 0
+        self._journal = None
         if not issubclass(ptype, Predicate):
             raise TypeError("{} is not a subclass of Predicate".format(ptype))
         if indexes:
@@ -2852,10 +3407,66 @@ class _FactMap(object):
             if len(preds) != 1 or preds != set([ptype]):
                 raise TypeError("Fields in {} do not belong to {}".format(indexes,preds))
 
+    # Copy-on-write support. A copy of a _FactMap shares the fact set and the
+    # indexes with the original until one of them is modified. The first
+    # modification duplicates the shared structures unless no other _FactMap
+    # still references them. Note: _shared counts the _FactMaps sharing the
+    # data. A finalizer discounts a _FactMap that is garbage collected while
+    # still sharing, so temporary copies don't cause unnecessary duplication.
+    def _share(self, shared):
+        shared[0] += 1
+        self._shared = shared
+        self._unshare = weakref.finalize(self, _FactMap._release, shared)
+
+    @staticmethod
+    def _release(shared):
+        shared[0] -= 1
+
+    def _own(self, copy=True):
+        shared = self._shared
+        if shared is None: return
+        self._shared = None
+        self._unshare.detach()
+        self._unshare = None
+        shared[0] -= 1
+        if shared[0] == 0: return
+        if not copy:
+            self._allfacts = _FactSet()
+            if self._findexes:
+                self._findexes = collections.OrderedDict(
+                    (hp, _FactIndex(fi.path)) for hp,fi in self._findexes.items())
+            return
+        self._allfacts = self._allfacts.copy()
+        if self._findexes:
+            self._findexes = collections.OrderedDict(
+                (hp, fi.copy()) for hp,fi in self._findexes.items())
+
     def _add_fact(self,fact):
+        if fact in self._allfacts: return
+        self._own()
         self._allfacts.add(fact)
+        self._digest = (self._digest + _mix_hash(fact)) & _HASH_MASK
         if self._findexes:
             for findex in self._findexes.values(): findex.add(fact)
+        if self._journal is not None: self._journal.append((fact, True))
+
+    # Add a collection of facts with each index being updated only once
+    def _add_facts(self, facts):
+        if not facts: return
+        self._own()
+        allfacts = self._allfacts
+        digest = self._digest
+        newfacts = []
+        for f in facts:
+            if f in allfacts: continue
+            allfacts.add(f)
+            digest += _mix_hash(f)
+            newfacts.append(f)
+        self._digest = digest & _HASH_MASK
+        if self._findexes:
+            for findex in self._findexes.values(): findex.add_all(newfacts)
+        if self._journal is not None:
+            self._journal.extend((f, True) for f in newfacts)
 
     def add(self, arg):
         if isinstance(arg, Predicate): return self._add_fact(arg)
@@ -2865,10 +3476,30 @@ class _FactMap(object):
         self.remove(fact, False)
 
     def remove(self, fact, raise_on_missing=True):
+        if not raise_on_missing and fact not in self._allfacts: return
+        self._own()
         if raise_on_missing: self._allfacts.remove(fact)
         else: self._allfacts.discard(fact)
+        self._digest = (self._digest - _mix_hash(fact)) & _HASH_MASK
         if self._findexes:
             for findex in self._findexes.values(): findex.remove(fact,raise_on_missing)
+        if self._journal is not None: self._journal.append((fact, False))
+
+    # Remove a collection of facts with each index being updated only once
+    def discard_all(self, facts):
+        if not facts: return
+        self._own()
+        allfacts = self._allfacts
+        digest = self._digest
+        journal = self._journal
+        for f in facts:
+            if f not in allfacts: continue
+            allfacts.discard(f)
+            digest -= _mix_hash(f)
+            if journal is not None: journal.append((f, False))
+        self._digest = digest & _HASH_MASK
+        if self._findexes:
+            for findex in self._findexes.values(): findex.discard_all(facts)
 
     @property
     def predicate(self):
@@ -2881,10 +3512,19 @@ class _FactMap(object):
     def get_factindex(self, path):
         return self._findexes[path.meta.hashable]
 
+    # An order independent digest of the facts
+    @property
+    def digest(self):
+        return self._digest
+
     def facts(self):
         return self._allfacts
 
     def clear(self):
+        if self._journal is not None:
+            self._journal.extend((f, False) for f in self._allfacts)
+        self._own(copy=False)
+        self._digest = 0
         self._allfacts.clear()
         if self._findexes:
             for f, findex in self._findexes.items(): findex.clear()
@@ -2933,10 +3573,11 @@ class _FactMap(object):
         return iter(self._allfacts)
 
     def __eq__(self,other):
+        if self._digest != other._digest: return False
         return _is_set_equal(self._allfacts,other._allfacts)
 
     def __ne__(self,other):
-        return not _is_set_equal(self._allfacts,other._allfacts)
+        return not self.__eq__(other)
 
     def __lt__(self,other):
         return self._allfacts < other._allfacts
@@ -2952,61 +3593,91 @@ class _FactMap(object):
 
 
     #--------------------------------------------------------------------------
-    # Set functions
+    # Set functions. The result of a set operation is built from a structural
+    # copy of this _FactMap, or from scratch, depending on which requires the
+    # fewest facts to be (re-)indexed.
     #--------------------------------------------------------------------------
+
+    # Return a new _FactMap containing the facts to keep (a subset of this
+    # _FactMap's facts, in the same order) given the facts to remove.
+    def _derive(self, keep, remove):
+        if len(remove) < len(keep):
+            nfm = self.copy()
+            nfm.discard_all(remove)
+        else:
+            nfm = _FactMap(self.predicate, self.indexes)
+            nfm._add_facts(keep)
+        return nfm
+
     def union(self,*others):
-        nfm = _FactMap(self.predicate, self.indexes)
-        tmpothers = [o.facts() for o in others]
-        tmp = self.facts().union(*tmpothers)
-        nfm.add(tmp)
+        nfm = self.copy()
+        nfm.update(*others)
         return nfm
 
     def intersection(self,*others):
-        nfm = _FactMap(self.predicate, self.indexes)
-        tmpothers = [o.facts() for o in others]
-        tmp = self.facts().intersection(*tmpothers)
-        nfm.add(tmp)
-        return nfm
+        keep = []
+        remove = []
+        for f in self._allfacts:
+            if all(f in o for o in others): keep.append(f)
+            else: remove.append(f)
+        return self._derive(keep, remove)
 
     def difference(self,*others):
-        nfm = _FactMap(self.predicate, self.indexes)
-        tmpothers = [o.facts() for o in others]
-        tmp = self.facts().difference(*tmpothers)
-        nfm.add(tmp)
-        return nfm
+        keep = []
+        remove = []
+        for f in self._allfacts:
+            if any(f in o for o in others): remove.append(f)
+            else: keep.append(f)
+        return self._derive(keep, remove)
 
     def symmetric_difference(self,other):
-        nfm = _FactMap(self.predicate, self.indexes)
-        tmp = self.facts().symmetric_difference(other)
-        nfm.add(tmp)
+        nfm = self.copy()
+        nfm.symmetric_difference_update(other)
         return nfm
 
     def update(self,*others):
-        for f in itertools.chain(*[o.facts() for o in others]):
-            self._add_fact(f)
+        for o in others:
+            self._add_facts([f for f in o.facts() if f not in self._allfacts])
 
     def intersection_update(self,*others):
-        for f in set(self.facts()):
-            for o in others:
-                if f not in o: self.discard(f)
+        self.discard_all([f for f in self._allfacts \
+                          if any(f not in o for o in others)])
 
     def difference_update(self,*others):
-        for f in itertools.chain(*[o.facts() for o in others]):
-            self.discard(f)
+        self.discard_all([f for o in others for f in o.facts() \
+                          if f in self._allfacts])
 
     def symmetric_difference_update(self, other):
-        to_remove=set()
-        to_add=set()
-        for f in self._allfacts:
-            if f in other._allfacts: to_remove.add(f)
+        to_remove=[]
+        to_add=[]
+        allfacts = self._allfacts
         for f in other._allfacts:
-            if f not in self._allfacts: to_add.add(f)
-        for f in to_remove: self.discard(f)
-        for f in to_add: self._add_fact(f)
-
+            if f in allfacts: to_remove.append(f)
+            else: to_add.append(f)
+        self.discard_all(to_remove)
+        self._add_facts(to_add)
+
+    # Return the facts that would need to be added and removed to turn this
+    # _FactMap into other. Facts that are still shared after a copy (see
+    # _own()) are known to be unchanged.
+    def diff(self, other):
+        if self._allfacts is other._allfacts: return [], []
+        if not self._allfacts: return list(other._allfacts), []
+        if not other._allfacts: return [], list(self._allfacts)
+        added = [ f for f in other._allfacts if f not in self._allfacts ]
+        removed = [ f for f in self._allfacts if f not in other._allfacts ]
+        return added, removed
+
+    # A copy shares the set of facts and the indexes with this _FactMap until
+    # one of them is modified (see _own()).
     def copy(self):
-        nfm = _FactMap(self.predicate, self.indexes)
-        nfm.add(self.facts())
+        nfm = _FactMap(self.predicate)
+        nfm._indexes = self._indexes
+        nfm._allfacts = self._allfacts
+        nfm._findexes = self._findexes
+        nfm._digest = self._digest
+        if self._shared is None: self._share([0])
+        nfm._share(self._shared)
         return nfm
 
 
@@ -3069,12 +3740,18 @@ class FactBase(object):
 
         # flag that initialisation has taken place
         self._delayed_init = None
+        self._journal = None
+        self._journal_start = 0
 
         # If it is delayed initialisation then get the facts
         if facts and callable(facts):
             facts = facts()
-        elif facts and isinstance(facts, FactBase) and indexes is None:
-            indexes = facts.indexes
+        elif isinstance(facts, FactBase) and indexes is None:
+            # A copy of another FactBase so clone its data structures
+            facts._check_init()
+            self._indexes = facts._indexes
+            self._factmaps = { pt : fm.copy() for pt, fm in facts._factmaps.items() }
+            return
         if indexes is None: indexes=[]
 
         # Create _FactMaps for the predicate types with indexed fields
@@ -3107,16 +3784,30 @@ class FactBase(object):
         if not issubclass(ptype,Predicate):
             raise TypeError(("type of object {} is not a Predicate "
                              "(or sub-class)").format(fact))
-        if ptype not in self._factmaps:
-            self._factmaps[ptype] = _FactMap(ptype)
-        self._factmaps[ptype].add(fact)
+        self._factmap(ptype).add(fact)
+
+    # Return the _FactMap for a predicate type, creating it if necessary
+    def _factmap(self, ptype):
+        fm = self._factmaps.get(ptype)
+        if fm is None:
+            fm = self._factmaps[ptype] = _FactMap(ptype)
+            fm._journal = self._journal
+        return fm
+
+    # Add a copy of another fact base's _FactMap for a new predicate type
+    def _adopt_factmap(self, fm):
+        fm = self._factmaps[fm.predicate] = fm.copy()
+        if self._journal is not None:
+            fm._journal = self._journal
+            self._journal.extend((f, True) for f in fm.facts())
 
     def _remove(self, fact, raise_on_missing):
         ptype = type(fact)
-        if not isinstance(arg, Predicate) or ptype not in self._factmaps:
-            raise KeyError("{} not in factbase".format(arg))
-
-        return self._factmaps[ptype].delete()
+        if not isinstance(fact, Predicate) or ptype not in self._factmaps:
+            if raise_on_missing:
+                raise KeyError("{} not in factbase".format(fact))
+            return
+        return self._factmaps[ptype].remove(fact, raise_on_missing)
 
     #--------------------------------------------------------------------------
     # Initiliser
@@ -3165,17 +3856,24 @@ class FactBase(object):
         """Create a Select query for a predicate type."""
 
         self._check_init()  # Check for delayed init
-        if ptype not in self._factmaps:
-            self._factmaps[ptype] = _FactMap(ptype)
-        return self._factmaps[ptype].select()
+        return self._factmap(ptype).select()
 
     def delete(self, ptype):
         """Create a Select query for a predicate type."""
 
         self._check_init()  # Check for delayed init
-        if ptype not in self._factmaps:
-            self._factmaps[ptype] = _FactMap(ptype)
-        return self._factmaps[ptype].delete()
+        return self._factmap(ptype).delete()
+
+    def join(self, ptype1, ptype2):
+        """Create a Join query over two predicate types.
+
+        The query returns pairs of facts (of the first and second predicate type
+        respectively) that satisfy the join condition.
+
+        """
+
+        self._check_init()  # Check for delayed init
+        return _Join(self._factmap(ptype1), self._factmap(ptype2))
 
     @property
     def predicates(self):
@@ -3189,6 +3887,20 @@ class FactBase(object):
         self._check_init()  # Check for delayed init
         return self._indexes
 
+    @property
+    def fingerprint(self):
+        """Return an order independent digest of the facts in the fact base.
+
+        The fingerprint is maintained as facts are added and removed so is
+        cheap to access. Two fact bases with the same facts have the same
+        fingerprint, and a changed fingerprint means that the facts have
+        changed. However, as with any hash, different fact bases may share a
+        fingerprint.
+
+        """
+        self._check_init()  # Check for delayed init
+        return sum(fm.digest for fm in self._factmaps.values()) & _HASH_MASK
+
     def facts(self):
         """Return all facts."""
 
@@ -3274,9 +3986,7 @@ class FactBase(object):
         if self_fms.keys() != other_fms.keys(): return False
 
         for p, fm1 in self_fms.items():
-            fm2 = other_fms[p]
-            if not _is_set_equal(fm1.facts(),fm2.facts()): return False
-
+            if fm1 != other_fms[p]: return False
         return True
 
     def __ne__(self, other):
@@ -3432,8 +4142,9 @@ class FactBase(object):
         for p in predicates:
             if p in self._factmaps and p in other._factmaps:
                 fb._factmaps[p] = self._factmaps[p].symmetric_difference(other._factmaps[p])
+            elif p in self._factmaps:
+                fb._factmaps[p] = self._factmaps[p].copy()
             else:
-                if p in self._factmaps: fb._factmaps[p] = self._factmaps[p].copy()
                 fb._factmaps[p] = other._factmaps[p].copy()
 
         return fb
@@ -3447,7 +4158,7 @@ class FactBase(object):
         for o in others:
             for p,fm in o._factmaps.items():
                 if p in self._factmaps: self._factmaps[p].update(fm)
-                else: self._factmaps[p] = fm.copy()
+                else: self._adopt_factmap(fm)
 
     def intersection_update(self,*others):
         """Implements the set intersection_update() function"""
@@ -3488,16 +4199,212 @@ class FactBase(object):
             if p in self._factmaps and p in other._factmaps:
                 self._factmaps[p].symmetric_difference_update(other._factmaps[p])
             else:
-                if p in other._factmaps: self._factmaps[p] = other._factmaps[p].copy()
+                if p in other._factmaps: self._adopt_factmap(other._factmaps[p])
+
+
+    #--------------------------------------------------------------------------
+    # Change tracking
+    #--------------------------------------------------------------------------
+    def checkpoint(self):
+        """Return a checkpoint for tracking the changes made to the fact base.
+
+        The first call to ``checkpoint()`` turns on change tracking, where
+        every fact that is added to or removed from the fact base is recorded
+        in a journal. The changes made since a checkpoint can then be retrieved
+        with ``changes_since()``.
+
+        """
+        self._check_init()  # Check for delayed init
+        if self._journal is None:
+            self._journal = []
+            for fm in self._factmaps.values(): fm._journal = self._journal
+        return self._journal_start + len(self._journal)
+
+    def changes_since(self, checkpoint):
+        """Return the facts added and removed since a checkpoint.
 
+        The changes are returned in the same format as ``diff()``. Changes that
+        cancel each other out (such as a fact being added and then removed) are
+        not included.
+
+        Args:
+          checkpoint: a value returned by ``checkpoint()``.
+
+        """
+        journal = self._get_journal(checkpoint)
+        first = {}
+        last = {}
+        for fact, isadd in itertools.islice(journal, checkpoint - self._journal_start, None):
+            if fact not in first: first[fact] = isadd
+            last[fact] = isadd
+
+        added = {}
+        removed = {}
+        for fact, isadd in last.items():
+            if isadd != first[fact]: continue
+            changes = added if isadd else removed
+            changes.setdefault(type(fact), []).append(fact)
+        return added, removed
+
+    def release_checkpoint(self, checkpoint):
+        """Discard the journal entries recorded before a checkpoint.
+
+        Change tracking keeps a journal of every modification so to limit its
+        size the checkpoints that are no longer needed should be released.
+        Releasing a checkpoint invalidates any earlier checkpoints. If there
+        have been no changes since the released checkpoint then change tracking
+        is turned off until ``checkpoint()`` is next called.
+
+        Args:
+          checkpoint: a value returned by ``checkpoint()``.
+
+        """
+        journal = self._get_journal(checkpoint)
+        del journal[:checkpoint - self._journal_start]
+        self._journal_start = checkpoint
+        if not journal:
+            self._journal = None
+            for fm in self._factmaps.values(): fm._journal = None
+
+    def _get_journal(self, checkpoint):
+        self._check_init()  # Check for delayed init
+        journal = self._journal
+        if journal is None or \
+           not (self._journal_start <= checkpoint <= self._journal_start + len(journal)):
+            raise ValueError("Invalid checkpoint '{}'".format(checkpoint))
+        return journal
+
+    def diff(self, other):
+        """Return the facts that differ between this fact base and another.
+
+        Returns a pair ``(added, removed)`` of dicts mapping each predicate type
+        to a list of facts; ``added`` contains the facts in ``other`` but not in
+        this fact base and ``removed`` contains the facts in this fact base but
+        not in ``other``. Predicate types with no changes are omitted.
+
+        Unlike ``symmetric_difference()`` no new fact base is built. When the
+        two fact bases are copies of each other (see ``copy()``) the predicate
+        types that neither has modified are skipped without being examined.
+
+        Args:
+          other(FactBase|[Predicate]): the fact base to compare against.
+
+        """
+        if not isinstance(other, FactBase): other=FactBase(other)
+        self._check_init(); other._check_init() # Check for delayed init
+
+        added = {}
+        removed = {}
+        predicates = list(self._factmaps.keys())
+        predicates.extend(p for p in other._factmaps.keys() \
+                          if p not in self._factmaps)
+        for p in predicates:
+            sfm = self._factmaps.get(p)
+            ofm = other._factmaps.get(p)
+            if sfm is None: padded, premoved = list(ofm.facts()), []
+            elif ofm is None: padded, premoved = [], list(sfm.facts())
+            else: padded, premoved = sfm.diff(ofm)
+            if padded: added[p] = padded
+            if premoved: removed[p] = premoved
+        return added, removed
 
     def copy(self):
-        """Implements the set copy() function"""
+        """Implements the set copy() function
+
+        The copy is cheap to make as the facts and indexes for each predicate
+        type are shared with the original and are only duplicated when either
+        the copy or the original first modifies the facts of that type.
+
+        """
         self._check_init() # Check for delayed init
-        fb=FactBase()
-        for p,fm in self._factmaps.items():
-            fb._factmaps[p] = self._factmaps[p].copy()
-        return fb
+        return FactBase(self)
+
+    def freeze(self):
+        """Return an immutable (and hashable) FrozenFactBase of the facts.
+
+        Since the facts are shared with this fact base (until it is modified)
+        creating the FrozenFactBase is cheap.
+
+        """
+        self._check_init() # Check for delayed init
+        return FrozenFactBase(self)
+
+#------------------------------------------------------------------------------
+# FrozenFactBase is an immutable FactBase so can be used as a dict key or
+# stored in a set. Its hash is the fact base fingerprint.
+#------------------------------------------------------------------------------
+
+class FrozenFactBase(FactBase):
+    """An immutable and hashable FactBase.
+
+    A FrozenFactBase supports all the non-modifying operations of a FactBase,
+    including queries (but not delete queries). The set operations return
+    FrozenFactBase objects. Since it is hashable a FrozenFactBase can be used
+    as a dict key or as the member of a set. An equality comparison between two
+    FrozenFactBase objects is decided by their hash values when they differ.
+
+    Args:
+      facts([Predicate]|FactBase|callable): as for FactBase.
+      indexes(Field): as for FactBase.
+
+    """
+
+    def __init__(self, facts=None, indexes=None):
+        self._hash = None
+        super().__init__(facts, indexes)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("A FrozenFactBase cannot be modified")
+
+    add = _immutable
+    remove = _immutable
+    discard = _immutable
+    pop = _immutable
+    clear = _immutable
+    delete = _immutable
+    update = _immutable
+    intersection_update = _immutable
+    difference_update = _immutable
+    symmetric_difference_update = _immutable
+
+    def __hash__(self):
+        if self._hash is None: self._hash = hash(self.fingerprint)
+        return self._hash
+
+    def __eq__(self, other):
+        """Overloaded boolean operator."""
+        if self is other: return True
+        if isinstance(other, FrozenFactBase) and hash(self) != hash(other):
+            return False
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        """Overloaded boolean operator."""
+        return not self.__eq__(other)
+
+    def union(self,*others):
+        """Implements the set union() function"""
+        return FrozenFactBase(super().union(*others))
+
+    def intersection(self,*others):
+        """Implements the set intersection() function"""
+        return FrozenFactBase(super().intersection(*others))
+
+    def difference(self,*others):
+        """Implements the set difference() function"""
+        return FrozenFactBase(super().difference(*others))
+
+    def symmetric_difference(self,other):
+        """Implements the set symmetric_difference() function"""
+        return FrozenFactBase(super().symmetric_difference(other))
+
+    def copy(self):
+        """Implements the set copy() function (returning itself)"""
+        return self
+
+    def freeze(self):
+        """Returns itself"""
+        return self
 
 #------------------------------------------------------------------------------
 #------------------------------------------------------------------------------
@@ -3507,7 +4414,7 @@ class FactBase(object):
 # matters) and a set of raw clingo symbols against this list.
 # ------------------------------------------------------------------------------
 
-def _unify(predicates, symbols):
+def _unify(predicates, symbols, cache=None):
     def unify_single(cls, r):
         try:
             return cls._unify(r)
@@ -3525,14 +4432,60 @@ def _unify(predicates, symbols):
         else: types[sig].append(cls)
 
     # Loop through symbols and yield when we have a match
+    if cache is None:
+        for raw in symbols:
+            classes = types.get((raw.name, len(raw.arguments)))
+            if not classes: continue
+            for cls in classes:
+                f = unify_single(cls,raw)
+                if f:
+                    yield f
+                    break
+        return
+
+    # With a cache the result for each symbol with a matching signature
+    # (including a failure to unify) is looked up first and only unified if it
+    # is missing. Symbols that don't match any signature are never cached so
+    # they can't evict useful entries.
     for raw in symbols:
         classes = types.get((raw.name, len(raw.arguments)))
         if not classes: continue
-        for cls in classes:
-            f = unify_single(cls,raw)
-            if f:
-                yield f
-                break
+        f = cache.get(raw, _UnifierCache.missing)
+        if f is _UnifierCache.missing:
+            f = None
+            for cls in classes:
+                f = unify_single(cls,raw)
+                if f: break
+            cache.put(raw, f)
+        if f: yield f
+
+#------------------------------------------------------------------------------
+# A bounded cache of the results of unifying symbols; evicting the least
+# recently used entries when full.
+# ------------------------------------------------------------------------------
+class _UnifierCache(object):
+    missing = object()
+
+    def __init__(self, size):
+        self._size = size
+        self._entries = collections.OrderedDict()
+
+    def get(self, raw, default):
+        entries = self._entries
+        f = entries.get(raw, default)
+        if f is not default: entries.move_to_end(raw)
+        return f
+
+    def put(self, raw, fact):
+        entries = self._entries
+        entries[raw] = fact
+        if len(entries) > self._size: entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
 
 
 #------------------------------------------------------------------------------
@@ -3544,12 +4497,22 @@ class SymbolPredicateUnifier(object):
     with Clorm predicates. Predicates classes are registered using the
     'register' function (which can be called as a normal function or as a class
     decorator.
+
+    The unifier can optionally cache the facts that are created for each
+    symbol (up to ``cache_size`` symbols). This avoids unifying the same symbol
+    repeatedly, for example, when extracting the facts from successive models
+    during enumeration or optimisation where the models share most atoms.
+
     """
 
-    def __init__(self, predicates=[], indexes=[], suppress_auto_index=False):
+    def __init__(self, predicates=[], indexes=[], suppress_auto_index=False,
+                 cache_size=0):
         self._predicates = ()
         self._indexes = ()
         self._suppress_auto_index = suppress_auto_index
+        if cache_size < 0:
+            raise ValueError("Invalid cache_size '{}'".format(cache_size))
+        self._cache = _UnifierCache(cache_size) if cache_size else None
         tmppreds = []
         tmpinds = []
         tmppredset = set()
@@ -3591,11 +4554,12 @@ class SymbolPredicateUnifier(object):
         self._register_predicate(cls,predicates,indexes,tmppredset,tmpindset)
         self._predicates = tuple(predicates)
         self._indexes = tuple(indexes)
+        if self._cache is not None: self._cache.clear()
         return cls
 
     def unify(self, symbols, delayed_init=False, raise_on_empty=False):
         def _populate():
-            facts=list(_unify(self.predicates, symbols))
+            facts=list(_unify(self.predicates, symbols, self._cache))
             if not facts and raise_on_empty:
                 raise ValueError("FactBase creation: failed to unify any symbols")
             return facts
@@ -7,8 +7,9 @@ forwarding of the member functions and attributes, while the wrapped class is
 replaced with object as the parent.
 
 Note: if a constructor is provided for the wrapper then it should call
-init_wrapper manually. It also sets up '_wrapped' and '_wrapped_cls' attributes
-so these cannot be attributes of the wrapped class.
+init_wrapper manually. It also sets up '_wrapped', '_wrapped_obj',
+'_wrapped_cls', and '_proxy_methods' attributes so these cannot be attributes
+of the wrapped class.
 
 This metaclass is to be used for wrapping clingo.Control, clingo.SolveHandle,
 and clingo.Model objects.
@@ -19,22 +20,51 @@ https://code.activestate.com/recipes/496741-object-proxying/
 '''
 
 import functools
+import operator
 
 # ------------------------------------------------------------------------------
-# Make proxy member functions and properties
+# Make proxy member functions and properties.
+#
+# A proxy member function is a non-data descriptor that, when first accessed
+# through a wrapper object, looks up the bound method of the wrapped object and
+# stores it in the wrapper object's __dict__. Since the instance __dict__ takes
+# precedence over a non-data descriptor every later access returns the wrapped
+# bound method directly, so there is no per-call forwarding overhead. Special
+# methods (which are looked up on the type) still go through the descriptor.
+# Accessing the member function through the class returns a function that
+# forwards the call to the wrapped object.
+#
+# The cached bound methods are removed whenever the wrapped object is set (see
+# _set_wrapped()) so they never refer to a replaced wrapped object.
 # ------------------------------------------------------------------------------
+class _ProxyMethod(object):
+    def __init__(self, fn):
+        name = fn.__name__
+        @functools.wraps(fn)
+        def forward(self, *args, **kwargs):
+            return getattr(self._wrapped, name)(*args, **kwargs)
+        functools.update_wrapper(self, fn)
+        self._name = name
+        self._forward = forward
+
+    def __get__(self, instance, owner=None):
+        if instance is None: return self._forward
+        bound = getattr(instance._wrapped, self._name)
+        instance.__dict__[self._name] = bound
+        return bound
+
 def _make_wrapper_function(fn):
-    @functools.wraps(fn)
-    def wrapper(self, *args, **kwargs):
-        func=self._wrapped.__getattribute__(fn.__name__)
-        return func(*args, **kwargs)
-    return wrapper
+    return _ProxyMethod(fn)
+
+def _set_wrapped(wrapper, wrapped):
+    d = wrapper.__dict__
+    d["_wrapped_obj"] = wrapped
+    for name in wrapper._proxy_methods: d.pop(name, None)
 
 def _make_wrapper_property(name, get_only=True):
-    def getter(self):
-        return self._wrapped.__getattribute__(name)
+    getter = operator.attrgetter("_wrapped." + name)
     def setter(self,x):
-        return self._wrapped.__setattr__(name,x)
+        return setattr(self._wrapped,name,x)
     return property(getter,setter)
 
 def _check_wrapper_object(wrapper,strict=False):
@@ -75,16 +105,21 @@ class WrapperMetaClass(type):
             raise TypeError(("ProxyMetaClass cannot proxy a class with a "
                              "\"_wrapped_cls\" attribute: {}").format(PrClass))
         dct["_wrapped_cls"] = Wrapped
+        dct["_wrapped"] = property(operator.attrgetter("_wrapped_obj"),
+                                   _set_wrapped)
 
         # Mirror the attributes of the proxied class
+        proxy_methods = []
         for key,value in Wrapped.__dict__.items():
             if key in ignore: continue
             if key in dct: continue
 
             if callable(value):
                 dct[key]=_make_wrapper_function(value)
+                proxy_methods.append(key)
             else:
                 dct[key]=_make_wrapper_property(key)
+        dct["_proxy_methods"] = tuple(proxy_methods)
 
         # Create the init function if none is provided
         if "__init__" not in dct: dct["__init__"] = init_wrapper
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------------
+# Compare the different modes of adding facts to a clorm.clingo.Control object
+#------------------------------------------------------------------------------
+
+import sys
+import time
+
+from clorm import Predicate, ConstantField, IntegerField, FactBase
+from clorm.clingo import Control
+
+#------------------------------------------------------------------------------
+#
+#------------------------------------------------------------------------------
+
+class Profiler(object):
+    def __init__(self,msg):
+        self._msg=msg
+        self._calls=[]
+        self._justified=0
+
+    def __call__(self,msg,func,*args,**kwargs):
+        self._justified=max(len(msg)+3, self._justified)
+        starttime = time.process_time()
+        res=func(*args,**kwargs)
+        endtime = time.process_time()
+        self._calls.append((msg,endtime-starttime))
+        return res
+
+    def print_stats(self):
+        print("\n".ljust(self._justified+10,'='))
+        print("{}".format(self._msg))
+        for msg,cputime in self._calls:
+            print("{}: {:.3f}".format(msg.ljust(self._justified),cputime))
+
+#------------------------------------------------------------------------------
+# A simple data model and program
+#------------------------------------------------------------------------------
+
+class P(Predicate):
+    a=IntegerField
+    b=ConstantField
+
+ASP_PROGRAM="q(A) :- p(A,B), A \\ 2 = 0."
+
+def add_and_ground(facts, mode):
+    ctrl = Control()
+    ctrl.add_facts(facts, mode=mode)
+    ctrl.add("base", [], ASP_PROGRAM)
+    ctrl.ground([("base",[])])
+    return ctrl
+
+def run(num):
+    facts = FactBase([ P(a,"blah") for a in range(0,num) ])
+    pr=Profiler("Adding {} facts to a Control object and grounding".format(num))
+    for mode in ["ast", "string", "backend"]:
+        pr("Mode '{}'".format(mode), add_and_ground, facts, mode)
+    return pr
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    run(num).print_stats()
+
+#------------------------------------------------------------------------------
+# main
+#------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+#------------------------------------------------------------------------------
+# Compare the cost of calling methods and properties through the clorm.clingo
+# wrapper objects with calling them on the raw clingo objects.
+#------------------------------------------------------------------------------
+
+import sys
+import time
+
+import clingo as oclingo
+import clorm.clingo as cclingo
+
+#------------------------------------------------------------------------------
+#
+#------------------------------------------------------------------------------
+
+class Profiler(object):
+    def __init__(self,msg):
+        self._msg=msg
+        self._calls=[]
+        self._justified=0
+
+    def __call__(self,msg,func,*args,**kwargs):
+        self._justified=max(len(msg)+3, self._justified)
+        starttime = time.process_time()
+        res=func(*args,**kwargs)
+        endtime = time.process_time()
+        self._calls.append((msg,endtime-starttime))
+        return res
+
+    def print_stats(self):
+        print("\n".ljust(self._justified+10,'='))
+        print("{}".format(self._msg))
+        for msg,cputime in self._calls:
+            print("{}: {:.3f}".format(msg.ljust(self._justified),cputime))
+
+#------------------------------------------------------------------------------
+# Call the model methods and properties in a tight loop from within the
+# on_model callback.
+#------------------------------------------------------------------------------
+
+ASP_PROGRAM="p(1..10)."
+
+def call_model(ctrl, num):
+    def on_model(model):
+        for _ in range(num):
+            model.is_true(1)
+            model.number
+    ctrl.solve(on_model=on_model)
+
+def call_handle(ctrl, num):
+    for _ in range(num):
+        with ctrl.solve(yield_=True) as handle:
+            for model in handle: model.number
+            handle.get()
+
+def make_control(cls):
+    ctrl = cls()
+    ctrl.add("base", [], ASP_PROGRAM)
+    ctrl.ground([("base",[])])
+    return ctrl
+
+def run(num):
+    pr=Profiler("Calling {} model and {}/100 solve handle methods".format(num,num))
+    raw = make_control(oclingo.Control)
+    wrapped = make_control(cclingo.Control)
+    pr("Raw clingo Model", call_model, raw, num)
+    pr("Wrapped clorm Model", call_model, wrapped, num)
+    pr("Raw clingo SolveHandle", call_handle, raw, num//100)
+    pr("Wrapped clorm SolveHandle", call_handle, wrapped, num//100)
+    return pr
+
+def main():
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    run(num).print_stats()
+
+#------------------------------------------------------------------------------
+# main
+#------------------------------------------------------------------------------
+if __name__ == "__main__":
+    main()
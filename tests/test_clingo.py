@@ -2,13 +2,17 @@
 # Unit tests for the clorm monkey patching
 #------------------------------------------------------------------------------
 import unittest
+import asyncio
+import multiprocessing
+import time
 
 from .support import check_errmsg
 
 import clingo as oclingo
 import clorm.clingo as cclingo
 #from clorm.clingo import *
-from clorm.clingo import Number, String, Function, parse_program, Control
+from clorm.clingo import Number, String, Function, parse_program, Control, \
+    ModelCollector, BatchSolver, ControlPool, Assumptions
 from clorm.clingo import _expand_assumptions
 
 from clorm import Predicate, IntegerField, StringField, FactBase,\
@@ -603,7 +607,57 @@ class ClingoTestCase(unittest.TestCase):
         ctrl.solve(on_model=on_model, assumptions=[(FactBase([g1]),True),(set([g2]),False)])
         self.assertEqual(num_models, 2)
 
+    #--------------------------------------------------------------------------
+    # Test precompiled assumptions
+    #--------------------------------------------------------------------------
+    def test_precompiled_assumptions(self):
+        class F(Predicate):
+            num1=IntegerField()
+        class G(Predicate):
+            num1=IntegerField()
+        f1 = F(1) ; f2 = F(2) ; f3 = F(3)
+        g1 = G(1) ; g2 = G(2) ; g3 = G(3)
 
+        assumptions = Assumptions([(FactBase([g1,g2]),True),(set([g3.raw]),False)])
+        self.assertEqual(len(assumptions), 3)
+        self.assertTrue(g3 in assumptions)
+        self.assertEqual(assumptions.get(g1), True)
+        self.assertEqual(assumptions.get(g3.raw), False)
+        self.assertEqual(assumptions.get(f1), None)
+        self.assertTrue(_expand_assumptions(assumptions) is assumptions.symbols())
+
+        # Incremental edits
+        assumptions.set(g2, False)
+        self.assertEqual(set(assumptions),
+                         set([(g1.raw,True),(g2.raw,False),(g3.raw,False)]))
+        assumptions.discard(g1)
+        assumptions.discard(g1)
+        self.assertEqual(set(assumptions), set([(g2.raw,False),(g3.raw,False)]))
+        with self.assertRaises(KeyError) as ctx:
+            assumptions.remove(g1)
+        cp = assumptions.copy()
+        assumptions.clear()
+        self.assertEqual(len(assumptions), 0)
+        self.assertEqual(len(cp), 2)
+
+        ctrl = cclingo.Control(['-n 0'],unifier=[G])
+        ctrl.add("base", [], "1 { g(N) : f(N) } 2.")
+        ctrl.add_facts([f1,f2,f3])
+        ctrl.ground([("base",[])])
+
+        def count(assumptions):
+            models = []
+            ctrl.solve(on_model=lambda m: models.append(m), assumptions=assumptions)
+            return len(models)
+
+        assumptions = Assumptions([(g1,True)])
+        self.assertEqual(count(assumptions), 3)
+        assumptions.set(g2, True)
+        self.assertEqual(count(assumptions), 1)
+        assumptions.set(g2, False)
+        self.assertEqual(count(assumptions), 2)
+        assumptions.remove(g2)
+        self.assertEqual(count(assumptions), 3)
 
     #--------------------------------------------------------------------------
     # Test the solve
@@ -845,6 +899,423 @@ g(N) :- f(N)."""
             fb = m.facts(atoms=True)
             self.assertEqual(fb,FactBase())
 
+    #--------------------------------------------------------------------------
+    # Test batch assignment and release of externals
+    #--------------------------------------------------------------------------
+    def test_assign_and_release_externals(self):
+        class F(Predicate):
+            num1=IntegerField()
+        class G(Predicate):
+            num1=IntegerField()
+
+        f1 = F(1) ; f2 = F(2) ; f3 = F(3)
+        g1 = G(1) ; g2 = G(2) ; g3 = G(3)
+        ctrl = cclingo.Control(unifier=[F,G])
+        ctrl.add("base", [], "#external f(1..3). g(N) :- f(N).")
+        ctrl.ground([("base",[])])
+
+        def solve():
+            with ctrl.solve(yield_=True) as sh:
+                return list(sh)[0].facts(atoms=True)
+
+        # Facts that are not externals are ignored
+        ctrl.assign_externals(FactBase([f1,f2,f3,F(4),g1]))
+        self.assertEqual(solve(), FactBase([f1,f2,f3,g1,g2,g3]))
+        self.assertEqual(set(ctrl._literals.keys()), set([f1.raw,f2.raw,f3.raw]))
+
+        ctrl.assign_externals([f1,f2.raw], False)
+        self.assertEqual(solve(), FactBase([f3,g3]))
+
+        lit3 = ctrl.symbolic_atoms[f3.raw].literal
+        ctrl.assign_externals({f1 : True, f2.raw : True, lit3 : False})
+        self.assertEqual(solve(), FactBase([f1,f2,g1,g2]))
+
+        ctrl.release_externals([f1,F(4)])
+        self.assertFalse(f1.raw in ctrl._literals)
+        self.assertEqual(solve(), FactBase([f2,g2]))
+
+    #--------------------------------------------------------------------------
+    # Test the different modes for adding facts
+    #--------------------------------------------------------------------------
+    def test_add_facts_modes(self):
+        class F(Predicate):
+            num1=IntegerField()
+            str1=StringField()
+        class G(Predicate):
+            num1=IntegerField()
+
+        facts = [F(1,"a b"), F(2,'quoted "c"'), Function("g",[Number(3)])]
+        expected = FactBase([F(1,"a b"), F(2,'quoted "c"'), G(1), G(2), G(3)])
+
+        for mode in ["ast", "string", "backend"]:
+            ctrl = cclingo.Control(unifier=[F,G])
+            ctrl.add_facts(facts, mode=mode)
+            ctrl.add("base", [], "g(N) :- f(N,_).")
+            ctrl.ground([("base",[])])
+            with ctrl.solve(yield_=True) as sh:
+                self.assertEqual(list(sh)[0].facts(atoms=True), expected)
+
+        with self.assertRaises(ValueError) as ctx:
+            cclingo.Control().add_facts(facts, mode="bad")
+
+    #--------------------------------------------------------------------------
+    # Test adding facts from a generator of tuples in chunks
+    #--------------------------------------------------------------------------
+    def test_add_facts_streaming(self):
+        class F(Predicate):
+            num1=IntegerField()
+            str1=StringField()
+
+        expected = FactBase([F(n,"x") for n in range(0,10)] + [F(20,"y")])
+        for mode in ["ast", "string", "backend"]:
+            ctrl = cclingo.Control(unifier=[F])
+            gen = ((n,"x") for n in range(0,10))
+            ctrl.add_facts(gen, mode=mode, predicate=F, chunk_size=3)
+            ctrl.add_facts([F(20,"y")], mode=mode)
+            ctrl.ground([("base",[])])
+            with ctrl.solve(yield_=True) as sh:
+                self.assertEqual(list(sh)[0].facts(atoms=True), expected)
+
+        with self.assertRaises(TypeError) as ctx:
+            cclingo.Control().add_facts([(1,"x")])
+        with self.assertRaises(ValueError) as ctx:
+            cclingo.Control().add_facts([], chunk_size=0)
+
+    #--------------------------------------------------------------------------
+    # Test extracting model facts by predicate signature
+    #--------------------------------------------------------------------------
+    def test_model_facts_by_signature(self):
+        class A(Predicate):
+            num1=IntegerField()
+        class B(Predicate):
+            num1=IntegerField()
+            class Meta: sign=False
+
+        ctrl = cclingo.Control(unifier=[A,B])
+        ctrl.add("base", [], "a(1..2). -b(1). aux(1..100). a(\"x\").")
+        ctrl.ground([("base",[])])
+        with ctrl.solve(yield_=True) as sh:
+            m = list(sh)[0]
+            fb = m.facts(by_signature=True)
+            self.assertEqual(fb, FactBase([A(1),A(2),B(1,sign=False)]))
+            self.assertEqual(fb, m.facts(atoms=True))
+            self.assertEqual(m.facts(unifier=[A],by_signature=True),
+                             FactBase([A(1),A(2)]))
+            with self.assertRaises(TypeError) as ctx:
+                m.facts(atoms=True,by_signature=True)
+
+    #--------------------------------------------------------------------------
+    # Test querying a model without building a FactBase
+    #--------------------------------------------------------------------------
+    def test_model_select(self):
+        class A(Predicate):
+            num1=IntegerField()
+            str1=StringField()
+        class B(Predicate):
+            num1=IntegerField()
+            class Meta: sign=False
+
+        ctrl = cclingo.Control()
+        ctrl.add("base", [], "a(1,\"x\"). a(2,\"y\"). a(3,\"y\"). a(4). -b(1). b(2).")
+        ctrl.ground([("base",[])])
+        with ctrl.solve(yield_=True) as sh:
+            m = list(sh)[0]
+            self.assertEqual(set(m.select(A).get()),
+                             set([A(1,"x"),A(2,"y"),A(3,"y")]))
+            self.assertEqual(set(m.select(A)), set(m.select(A).get()))
+            self.assertEqual(m.select(A).count(), 3)
+            self.assertEqual(m.select(B).get(), [B(1,sign=False)])
+
+            q = m.select(A).where(A.str1 == ph1_)
+            self.assertEqual(q.count("y"), 2)
+            self.assertEqual(q.get_unique("x"), A(1,"x"))
+            self.assertEqual(q.first("z"), None)
+            self.assertTrue(q.first("y") in [A(2,"y"),A(3,"y")])
+            with self.assertRaises(ValueError) as ctx:
+                q.get_unique("y")
+            with self.assertRaises(ValueError) as ctx:
+                q.get_unique("z")
+            with self.assertRaises(TypeError) as ctx:
+                m.select(A).where(B.num1 == 1)
+            with self.assertRaises(TypeError) as ctx:
+                m.select(1)
+
+    #--------------------------------------------------------------------------
+    # Test solving with asyncio
+    #--------------------------------------------------------------------------
+    def test_solve_async_and_models(self):
+        class F(Predicate):
+            num1=IntegerField()
+
+        def make_ctrl(n):
+            ctrl = cclingo.Control(["0"], unifier=[F])
+            ctrl.add("base", [], "{{ f(1..{}) }}.".format(n))
+            ctrl.ground([("base",[])])
+            return ctrl
+
+        async def count_models(ctrl, stop=None):
+            num = 0
+            async with ctrl.models() as it:
+                async for model in it:
+                    self.assertTrue(isinstance(model, cclingo.Model))
+                    model.facts(atoms=True)
+                    num += 1
+                    await asyncio.sleep(0)
+                    if stop and num >= stop: break
+            return num, it.result
+
+        async def solve_async(ctrl):
+            models = []
+            result = await ctrl.solve_async(on_model=lambda m: models.append(1))
+            return len(models), result
+
+        async def run():
+            return await asyncio.gather(count_models(make_ctrl(3)),
+                                        count_models(make_ctrl(4)),
+                                        count_models(make_ctrl(10), stop=5),
+                                        solve_async(make_ctrl(3)))
+
+        r1, r2, r3, r4 = asyncio.run(run())
+        self.assertEqual(r1[0], 8)
+        self.assertTrue(r1[1].satisfiable)
+        self.assertEqual(r2[0], 16)
+        self.assertEqual(r3, (5, None))
+        self.assertEqual(r4[0], 8)
+        self.assertTrue(r4[1].satisfiable)
+
+        # Breaking out of the iteration without closing the iterator cancels
+        # the search once the iterator is garbage collected
+        async def abandon(ctrl):
+            async for model in ctrl.models():
+                break
+            return await solve_async(ctrl)
+
+        r5 = asyncio.run(abandon(make_ctrl(3)))
+        self.assertEqual(r5[0], 8)
+
+        # Cancelling solve_async() cancels the search
+        async def cancel(ctrl):
+            task = asyncio.ensure_future(ctrl.solve_async(
+                on_model=lambda m: time.sleep(0.01)))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError) as ctx:
+                await task
+            return await solve_async(ctrl)
+
+        r6 = asyncio.run(cancel(make_ctrl(10)))
+        self.assertEqual(r6[0], 1024)
+
+    #--------------------------------------------------------------------------
+    # Test solving with the unification performed in the background
+    #--------------------------------------------------------------------------
+    def test_solve_unify(self):
+        class F(Predicate):
+            num1=IntegerField()
+
+        ctrl = cclingo.Control(["0"], unifier=[F])
+        ctrl.add("base", [], "{ f(1..3) }. :- not f(2).")
+        ctrl.ground([("base",[])])
+
+        result, futures = ctrl.solve_unify()
+        self.assertTrue(result.satisfiable)
+        self.assertEqual(len(futures), 4)
+        fbs = [ fut.result() for fut in futures ]
+        for fb in fbs: self.assertTrue(F(2) in fb)
+        self.assertEqual(set(len(fb) for fb in fbs), set([1,2,3]))
+
+        ctrl = cclingo.Control(["0"])
+        ctrl.add("base", [], "f(1).")
+        ctrl.ground([("base",[])])
+        with self.assertRaises(ValueError) as ctx:
+            ctrl.solve_unify()
+        result, futures = ctrl.solve_unify(unifier=[F])
+        self.assertEqual(futures[0].result(), FactBase([F(1)]))
+
+    #--------------------------------------------------------------------------
+    # Test collecting the best models of an optimisation problem
+    #--------------------------------------------------------------------------
+    def test_model_collector(self):
+        class F(Predicate):
+            num1=IntegerField()
+
+        with self.assertRaises(ValueError) as ctx:
+            ModelCollector(n=0)
+
+        ctrl = cclingo.Control(["0", "--opt-mode=optN"], unifier=[F])
+        ctrl.add("base", [], "1 { f(1..4) } 1. #maximize{ X : f(X) }.")
+        ctrl.ground([("base",[])])
+
+        collector = ModelCollector(n=2)
+        self.assertFalse(collector)
+        ctrl.solve(on_model=collector)
+        self.assertEqual(len(collector), 2)
+        self.assertEqual(collector.facts(), FactBase([F(4)]))
+        self.assertTrue(collector.facts() is collector.facts(-1))
+        self.assertEqual(collector.cost(), [-4])
+        self.assertTrue(collector.optimality_proven())
+        self.assertEqual(collector.symbols(), [Function("f",[Number(4)])])
+        with self.assertRaises(IndexError) as ctx:
+            collector.facts(2)
+
+        # Without a unifier
+        ctrl = cclingo.Control()
+        ctrl.add("base", [], "f(1).")
+        ctrl.ground([("base",[])])
+        collector = ModelCollector()
+        ctrl.solve(on_model=collector)
+        with self.assertRaises(ValueError) as ctx:
+            collector.facts()
+        collector = ModelCollector(unifier=[F])
+        ctrl.solve(on_model=collector)
+        self.assertEqual(collector.facts(), FactBase([F(1)]))
+
+    #--------------------------------------------------------------------------
+    # Test solving a batch of jobs on a process pool
+    #--------------------------------------------------------------------------
+    def test_batch_solver(self):
+        class F(Predicate):
+            num1=IntegerField()
+        class G(Predicate):
+            num1=IntegerField()
+
+        with self.assertRaises(ValueError) as ctx:
+            BatchSolver(unifier=[F], jobs_per_worker=0)
+
+        prgm = "g(N+1) :- f(N)."
+        jobs = [ (prgm, FactBase([F(i)])) for i in range(5) ]
+        jobs.append((prgm, "f(10)."))
+        jobs.append(("f(1). :- f(1).", None))
+
+        # A single worker that is replaced after every two jobs
+        with BatchSolver(unifier=[F,G], max_workers=1, jobs_per_worker=2) as solver:
+            results = list(solver.map(jobs))
+        expected = [ [FactBase([F(i),G(i+1)])] for i in range(5) ]
+        expected.append([FactBase([F(10),G(11)])])
+        expected.append([])
+        self.assertEqual(results, expected)
+
+        # The number of worker processes is bounded while they are replaced
+        with BatchSolver(unifier=[F,G], max_workers=2, jobs_per_worker=2) as solver:
+            futures = []
+            for i in range(24):
+                futures.append(solver.submit(prgm, [F(i)]))
+                self.assertTrue(len(multiprocessing.active_children()) <= 2)
+            self.assertEqual([ f.result() for f in futures ],
+                             [ [FactBase([F(i),G(i+1)])] for i in range(24) ])
+
+        # Enumerate all models
+        with BatchSolver(unifier=[F], control_args=["0"]) as solver:
+            models = solver.submit("{ f(1..2) }.").result()
+        self.assertEqual(len(models), 4)
+        self.assertTrue(FactBase([F(1),F(2)]) in models)
+
+    #--------------------------------------------------------------------------
+    # Test a pool of grounded control objects
+    #--------------------------------------------------------------------------
+    def test_control_pool(self):
+        class F(Predicate):
+            num1=IntegerField()
+        class G(Predicate):
+            num1=IntegerField()
+
+        created = []
+        def factory():
+            ctrl = cclingo.Control(unifier=[F,G])
+            ctrl.add("base", [], "#external f(1..3). g(N) :- f(N).")
+            ctrl.ground([("base",[])])
+            created.append(ctrl)
+            return ctrl
+
+        def solve(ctrl, assumptions=[]):
+            fbs = []
+            ctrl.solve(assumptions=assumptions,
+                       on_model=lambda m: fbs.append(m.facts(atoms=True)))
+            return fbs
+
+        with self.assertRaises(TypeError) as ctx:
+            ControlPool(None)
+
+        pool = ControlPool(factory, max_growth=2)
+        with pool.control(externals=FactBase([F(1),F(2)])) as ctrl:
+            self.assertEqual(solve(ctrl), [FactBase([F(1),F(2),G(1),G(2)])])
+            self.assertEqual(solve(ctrl, [(F(1),False)]), [])
+        self.assertEqual(len(pool), 1)
+
+        # The same control object is reused with the externals reset
+        with pool.control(externals=[F(3)]) as ctrl:
+            self.assertTrue(ctrl is created[0])
+            self.assertEqual(solve(ctrl), [FactBase([F(3),G(3)])])
+        ctrl = pool.checkout()
+        self.assertEqual(solve(ctrl), [FactBase()])
+        with self.assertRaises(ValueError) as ctx:
+            pool.checkin(factory())
+
+        # Evict the control object after it grows
+        ctrl.add("more", [], "h(1..5).")
+        ctrl.ground([("more",[])])
+        pool.checkin(ctrl)
+        self.assertEqual(len(pool), 0)
+
+        result = pool.solve(externals=[F(2)], assumptions=[(F(2),True)])
+        self.assertTrue(result.satisfiable)
+        self.assertEqual(len(created), 3)
+        self.assertEqual(len(pool), 1)
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+        # Evict by age
+        pool = ControlPool(factory, max_age=0)
+        with pool.control() as ctrl: pass
+        self.assertEqual(len(pool), 0)
+
+    #--------------------------------------------------------------------------
+    # Test synchronising facts with a control object
+    #--------------------------------------------------------------------------
+    def test_sync_facts(self):
+        class F(Predicate):
+            num1=IntegerField()
+        class G(Predicate):
+            num1=IntegerField()
+
+        f1 = F(1) ; f2 = F(2) ; f3 = F(3)
+        g1 = G(1) ; g2 = G(2) ; g3 = G(3)
+
+        def solve(ctrl):
+            with ctrl.solve(yield_=True) as sh:
+                return list(sh)[0].facts(atoms=True)
+
+        fb = FactBase([f1,f2])
+        ctrl = cclingo.Control(unifier=[F,G])
+        ctrl.sync_facts(fb)
+        ctrl.add("base", [], "g(N) :- f(N).")
+        ctrl.ground([("base",[])])
+        self.assertEqual(solve(ctrl), FactBase([f1,f2,g1,g2]))
+
+        # Changes to the factbase are mirrored, with new facts only visible to
+        # rules grounded later.
+        fb.remove(f1)
+        fb.add(f3)
+        ctrl.sync_facts(fb)
+        self.assertEqual(solve(ctrl), FactBase([f2,f3,g2]))
+
+        fb.add(f1)
+        ctrl.sync_facts(fb)
+        self.assertEqual(solve(ctrl), FactBase([f1,f2,f3,g1,g2]))
+
+        # Switching to a different factbase stops the first one journaling
+        fb2 = FactBase([f1,f2,f3])
+        ctrl.sync_facts(fb2)
+        self.assertIsNone(fb._journal)
+        self.assertIsNotNone(fb2._journal)
+
+        # Synchronise with a list and release the removed facts
+        ctrl.sync_facts([f3], release=True)
+        self.assertEqual(solve(ctrl), FactBase([f3]))
+        self.assertIsNone(fb2._journal)
+        with self.assertRaises(ValueError) as ctx:
+            ctrl.sync_facts([f1,f3])
+
 #------------------------------------------------------------------------------
 # main
 #------------------------------------------------------------------------------
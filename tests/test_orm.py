@@ -8,6 +8,7 @@ import datetime
 import calendar
 import operator
 import collections
+import itertools
 from .support import check_errmsg
 
 from clingo import Control, Number, String, Function, SymbolType, \
@@ -20,7 +21,7 @@ from clorm.orm import \
     not_, and_, or_, StaticComparator, BoolComparator, \
     ph_, ph1_, ph2_, _PositionalPlaceholder, _NamedPlaceholder, \
     _FactIndex, _FactMap, PredicatePath, path, hashable_path, \
-    unify, desc, asc, FactBase, SymbolPredicateUnifier,  \
+    unify, desc, asc, FactBase, FrozenFactBase, SymbolPredicateUnifier,  \
     TypeCastSignature, _get_annotations, make_function_asp_callable, \
     make_method_asp_callable, \
     ContextBuilder
@@ -2283,6 +2284,26 @@ class PredicatePathTestCase(unittest.TestCase):
         self.assertEqual(H.sign(h1_neg), h1_neg.sign)
         self.assertEqual(H.sign(h2_pos), h2_pos.sign)
 
+    def test_path_accessor(self):
+
+        F = self.F
+        G = self.G
+        H = self.H
+
+        f1_pos = F(a=1)
+        f1_neg = F(a=2,sign=False)
+        g1 = G(a="a",b="b")
+        h1 = H(a=10,b=f1_neg,c=g1,sign=False)
+
+        # The compiled accessor must match resolving the path
+        for p in [path(F), F.a, F.sign]:
+            for f in [f1_pos, f1_neg]:
+                self.assertEqual(p.meta.accessor(f), p(f))
+        for p in [path(H), H.a, H.b, H.b.a, H.b.sign, H.c, H.c.a, H.c[1],
+                  H.sign]:
+            self.assertEqual(p.meta.accessor(h1), p(h1))
+        self.assertTrue(H.b.a.meta.accessor is H.b.a.meta.accessor)
+
     def test_path_comparator(self):
 
         F = self.F
@@ -2449,6 +2470,89 @@ class FactIndexTestCase(unittest.TestCase):
         self.assertEqual(fi.find(operator.ge, 3), set([af3a, af3b]))
         self.assertEqual(fi.find(operator.gt, 3), set([]))
 
+    def test_count(self):
+        Afact = self.Afact
+
+        af1a = Afact(num1=1, str1="a")
+        af2a = Afact(num1=2, str1="a")
+        af2b = Afact(num1=2, str1="b")
+        af3a = Afact(num1=3, str1="a")
+        af3b = Afact(num1=3, str1="b")
+
+        fi = _FactIndex(Afact.num1)
+        allfacts = [ af1a, af2a, af2b, af3a, af3b ]
+        for f in allfacts: fi.add(f)
+
+        for op in [operator.eq, operator.ne, operator.lt,
+                   operator.le, operator.gt, operator.ge]:
+            for key in [0,1,2,3,4]:
+                self.assertEqual(fi.count(op,key), len(fi.find(op,key)))
+
+        self.assertEqual(fi.count(operator.ge, 0), 5)
+        self.assertEqual(fi.count(operator.gt, 0), 5)
+        self.assertEqual(fi.count(operator.eq, 2), 2)
+        self.assertEqual(fi.count(operator.lt, 3), 3)
+
+        # The counts must track changes to the index
+        fi.remove(af2a)
+        self.assertEqual(fi.count(operator.le, 2), 2)
+        fi.add(Afact(num1=0, str1="a"))
+        self.assertEqual(fi.count(operator.le, 2), 3)
+        fi.clear()
+        self.assertEqual(fi.count(operator.ne, 2), 0)
+
+    def test_discard_all(self):
+        Afact = self.Afact
+
+        af1a = Afact(num1=1, str1="a")
+        af2a = Afact(num1=2, str1="a")
+        af2b = Afact(num1=2, str1="b")
+        af3a = Afact(num1=3, str1="a")
+        af4a = Afact(num1=4, str1="a")
+
+        fi = _FactIndex(Afact.num1)
+        for f in [ af1a, af2a, af2b, af3a ]: fi.add(f)
+        self.assertEqual(fi.count(operator.ge, 1), 4)
+
+        fi.discard_all([af1a, af2a, af3a, af4a])
+        self.assertEqual(fi.keys, [2])
+        self.assertEqual(fi.find(operator.ge, 0), set([af2b]))
+        self.assertEqual(fi.count(operator.ge, 1), 1)
+
+        fi.discard_all([af2b])
+        self.assertEqual(fi.keys, [])
+
+    def test_add_all_and_copy(self):
+        Afact = self.Afact
+        fi = _FactIndex(Afact.num1)
+        fi.add(Afact(num1=3, str1="a"))
+        fi.add_all([Afact(num1=n, str1="a") for n in [5,1,3]])
+        self.assertEqual(fi.keys, [1,3,5])
+
+        with self.assertRaises(TypeError) as ctx:
+            fi.add_all([1])
+
+        fi2 = fi.copy()
+        fi2.add(Afact(num1=2, str1="a"))
+        fi2.discard(Afact(num1=5, str1="a"))
+        self.assertEqual(fi.keys, [1,3,5])
+        self.assertEqual(fi2.keys, [1,2,3])
+        self.assertEqual(fi2.count(operator.ge, 2), 2)
+
+    def test_find_keys_and_extrema(self):
+        Afact = self.Afact
+        fi = _FactIndex(Afact.num1)
+        for n in [3,1,4,1,5]: fi.add(Afact(num1=n, str1="a"))
+
+        self.assertEqual(fi.find_keys(operator.ne, 4), [1,3,5])
+        self.assertEqual(fi.find_keys(operator.ge, 2), [3,4,5])
+        self.assertEqual(fi.find_keys(operator.eq, 2), [])
+        self.assertEqual(fi.min_key(operator.gt, 1), 3)
+        self.assertEqual(fi.max_key(operator.lt, 5), 4)
+        self.assertEqual(fi.max_key(operator.ne, 5), 4)
+        with self.assertRaises(ValueError) as ctx:
+            fi.min_key(operator.gt, 5)
+
     def test_clear(self):
         Afact = self.Afact
         fi = _FactIndex(Afact.num1)
@@ -2703,6 +2807,100 @@ class FactMapTestCase(unittest.TestCase):
         fm1.symmetric_difference_update(fm2)
         self.assertEqual(fm1.facts(), set([af1,af4]))
 
+    def test_indexed_copy_and_set_ops(self):
+        Afact = self.Afact
+        idxs = [Afact.num1, Afact.str1]
+
+        af1 = Afact(num1=1, str1="a", str2="a")
+        af2 = Afact(num1=2, str1="b", str2="b")
+        af3 = Afact(num1=3, str1="a", str2="c")
+        af4 = Afact(num1=4, str1="b", str2="d")
+
+        fm1 = _FactMap(Afact, idxs)
+        fm2 = _FactMap(Afact, idxs)
+        fm1.add([af1,af2,af3])
+        fm2.add([af3,af4])
+
+        # Check that the facts and every index of a _FactMap are consistent
+        def check(fm, expected):
+            self.assertEqual(list(fm.facts()), expected)
+            self.assertEqual(fm.indexes, tuple(idxs))
+            for path in idxs:
+                findex = fm.get_factindex(path)
+                keys = sorted(set([ path.meta.accessor(f) for f in expected ]))
+                self.assertEqual(findex.keys, keys)
+                found = set()
+                for k in keys: found.update(findex.bucket(k))
+                self.assertEqual(found, set(expected))
+
+        # A copy has the same ordering and is independent of the original
+        fm3 = fm1.copy()
+        check(fm3, [af1,af2,af3])
+        fm3.add(af4)
+        fm3.remove(af1)
+        check(fm3, [af2,af3,af4])
+        check(fm1, [af1,af2,af3])
+
+        check(fm1.union(fm2), [af1,af2,af3,af4])
+        check(fm1.intersection(fm2), [af3])
+        check(fm1.difference(fm2), [af1,af2])
+        check(fm1.symmetric_difference(fm2), [af1,af2,af4])
+        check(fm1, [af1,af2,af3])
+        check(fm2, [af3,af4])
+
+        fm1.update(fm2)
+        check(fm1, [af1,af2,af3,af4])
+        fm1.symmetric_difference_update(fm3)
+        check(fm1, [af1])
+
+    def test_copy_on_write(self):
+        Afact = self.Afact
+        af1 = Afact(num1=1, str1="a", str2="a")
+        af2 = Afact(num1=2, str1="b", str2="b")
+        af3 = Afact(num1=3, str1="a", str2="c")
+
+        fm1 = _FactMap(Afact, [Afact.num1])
+        fm1.add([af1,af2])
+        fm2 = fm1.copy()
+        fm3 = fm1.copy()
+
+        # Copies share data until modified and operations that don't change
+        # anything don't trigger a copy
+        self.assertTrue(fm2.facts() is fm1.facts())
+        fm2.add(af1)
+        fm2.discard(af3)
+        fm2.discard_all([])
+        self.assertTrue(fm2.facts() is fm1.facts())
+
+        fm2.add(af3)
+        self.assertFalse(fm2.facts() is fm1.facts())
+        self.assertTrue(fm3.facts() is fm1.facts())
+        self.assertEqual(fm2.get_factindex(Afact.num1).keys, [1,2,3])
+        self.assertEqual(fm1.get_factindex(Afact.num1).keys, [1,2])
+
+        fm1.remove(af1)
+        self.assertEqual(list(fm1.facts()), [af2])
+        self.assertEqual(list(fm3.facts()), [af1,af2])
+
+        # The last holder of the shared data doesn't need to copy it
+        facts = fm3.facts()
+        fm3.add(af3)
+        self.assertTrue(fm3.facts() is facts)
+
+        fm4 = fm3.copy()
+        fm4.clear()
+        self.assertFalse(fm4)
+        self.assertEqual(fm4.get_factindex(Afact.num1).keys, [])
+        self.assertEqual(list(fm3.facts()), [af1,af2,af3])
+        self.assertEqual(fm3.get_factindex(Afact.num1).keys, [1,2,3])
+
+        # A garbage collected copy no longer counts as sharing the data
+        fm5 = fm3.copy()
+        del fm5
+        facts = fm3.facts()
+        fm3.remove(af3)
+        self.assertTrue(fm3.facts() is facts)
+
 #------------------------------------------------------------------------------
 # Test the FactBase
 #------------------------------------------------------------------------------
@@ -2994,9 +3192,31 @@ class FactBaseTestCase(unittest.TestCase):
         r=fb1.symmetric_difference([af2,bf3]); self.assertEqual(r,FactBase([af1,bf1,af2,bf3]))
         r =fb1 ^ [af2,bf3]; self.assertEqual(r,FactBase([af1,bf1,af2,bf3]))
 
+        r=fb1.symmetric_difference(FactBase([cf1])); self.assertEqual(r,FactBase([af1,bf1,cf1]))
+
         # Test copy
         r=fb1.copy(); self.assertEqual(r,fb1)
 
+        # Copies preserve the indexes and are independent of the original
+        fbi = FactBase([af1,af2,cf1], indexes=[Afact.str2,Cfact.num1])
+        for r in [fbi.copy(), FactBase(fbi)]:
+            self.assertEqual(r.indexes, fbi.indexes)
+            r.add(cf2)
+            r.discard(af1)
+            q = r.select(Cfact).where(Cfact.num1 >= 1)
+            self.assertEqual(set(q.get()), set([cf1,cf2]))
+            q = r.select(Afact).where(Afact.str2 == "a")
+            self.assertEqual(q.get(), [])
+            self.assertEqual(fbi, FactBase([af1,af2,cf1]))
+
+        # Queries on the original see its modifications but not the copy's
+        q = fbi.select(Cfact).where(Cfact.num1 >= 1)
+        r = fbi.copy()
+        r.add(cf3)
+        fbi.add(cf2)
+        self.assertEqual(set(q.get()), set([cf1,cf2]))
+        self.assertEqual(set(r.select(Cfact).get()), set([cf1,cf3]))
+
         # Test update()
         fb=FactBase([af1,af2])
         fb.update(FactBase([af3,bf1]),[cf1,cf2])
@@ -3032,6 +3252,245 @@ class FactBaseTestCase(unittest.TestCase):
         fb ^= FactBase([cf2])
         self.assertEqual(fb, FactBase([af1,af2,bf1,cf2]))
 
+    #--------------------------------------------------------------------------
+    # Test the fingerprint is maintained as the fact base is modified
+    #--------------------------------------------------------------------------
+    def test_fingerprint(self):
+        Afact = self._Afact
+        Bfact = self._Bfact
+
+        af1 = Afact(num1=1, str1="1", str2="a")
+        af2 = Afact(num1=2, str1="1", str2="b")
+        af3 = Afact(num1=3, str1="1", str2="c")
+        bf1 = Bfact(num1=1, str1="1", str2="a")
+
+        def check(fb):
+            self.assertEqual(fb.fingerprint, FactBase(list(fb)).fingerprint)
+
+        fb = FactBase(indexes=[Afact.num1])
+        empty = fb.fingerprint
+        self.assertEqual(FactBase([af1,bf1]).fingerprint,
+                         FactBase([bf1,af1]).fingerprint)
+        self.assertNotEqual(FactBase([af1]).fingerprint,
+                            FactBase([af2]).fingerprint)
+
+        fb.add([af1,af2,bf1])
+        fp = fb.fingerprint
+        self.assertNotEqual(fp, empty)
+        fb.add(af1)
+        self.assertEqual(fb.fingerprint, fp)
+        fb.discard(af3)
+        self.assertEqual(fb.fingerprint, fp)
+
+        fb2 = fb.copy()
+        fb2.add(af3)
+        check(fb2)
+        self.assertEqual(fb.fingerprint, fp)
+        fb2.remove(af3)
+        self.assertEqual(fb2.fingerprint, fp)
+
+        fb2.update([af3], FactBase([af1]))
+        check(fb2)
+        fb2.intersection_update([af1,af3,bf1])
+        check(fb2)
+        fb2.difference_update([af1])
+        check(fb2)
+        fb2.symmetric_difference_update([af2,af3])
+        check(fb2)
+        fb2.delete(Afact).where(Afact.num1 == 2).execute()
+        check(fb2)
+        fb2.pop()
+        check(fb2)
+        check(fb2 ^ fb)
+        fb.clear()
+        self.assertEqual(fb.fingerprint, empty)
+
+    #--------------------------------------------------------------------------
+    # Test the diff between fact bases
+    #--------------------------------------------------------------------------
+    def test_diff(self):
+        Afact = self._Afact
+        Bfact = self._Bfact
+        Cfact = self._Cfact
+
+        af1 = Afact(num1=1, str1="1", str2="a")
+        af2 = Afact(num1=2, str1="1", str2="b")
+        bf1 = Bfact(num1=1, str1="1", str2="a")
+        bf2 = Bfact(num1=2, str1="1", str2="b")
+        cf1 = Cfact(num1=1)
+
+        fb1 = FactBase([af1,af2,bf1])
+        self.assertEqual(fb1.diff(fb1), ({}, {}))
+        self.assertEqual(fb1.diff(FactBase([af2,bf1])), ({}, {Afact: [af1]}))
+        self.assertEqual(fb1.diff([af1,af2,bf2,cf1]),
+                         ({Bfact: [bf2], Cfact: [cf1]}, {Bfact: [bf1]}))
+        self.assertEqual(FactBase().diff(fb1),
+                         ({Afact: [af1,af2], Bfact: [bf1]}, {}))
+
+        # Diff against a modified copy
+        fb2 = fb1.copy()
+        fb2.add(cf1)
+        fb2.discard(af1)
+        added, removed = fb1.diff(fb2)
+        self.assertEqual(added, {Cfact: [cf1]})
+        self.assertEqual(removed, {Afact: [af1]})
+        self.assertEqual(fb1.symmetric_difference(fb2),
+                         FactBase(itertools.chain(*added.values(),
+                                                  *removed.values())))
+
+    #--------------------------------------------------------------------------
+    # Test change tracking
+    #--------------------------------------------------------------------------
+    def test_change_tracking(self):
+        Afact = self._Afact
+        Bfact = self._Bfact
+        Cfact = self._Cfact
+
+        af1 = Afact(num1=1, str1="1", str2="a")
+        af2 = Afact(num1=2, str1="1", str2="b")
+        bf1 = Bfact(num1=1, str1="1", str2="a")
+        bf2 = Bfact(num1=2, str1="1", str2="b")
+        cf1 = Cfact(num1=1)
+        cf2 = Cfact(num1=2)
+
+        fb = FactBase([af1,bf1], indexes=[Afact.num1])
+        with self.assertRaises(ValueError) as ctx:
+            fb.changes_since(0)
+
+        cp1 = fb.checkpoint()
+        self.assertEqual(fb.changes_since(cp1), ({}, {}))
+
+        fb.add([af2,cf1])
+        fb.add(af2)
+        fb.discard(bf1)
+        fb.discard(bf2)
+        self.assertEqual(fb.changes_since(cp1),
+                         ({Afact: [af2], Cfact: [cf1]}, {Bfact: [bf1]}))
+
+        # Add/remove pairs cancel out
+        cp2 = fb.checkpoint()
+        fb.remove(af2)
+        fb.add([af2, bf2])
+        fb.discard(bf2)
+        fb.update(FactBase([cf2]), [bf1])
+        self.assertEqual(fb.changes_since(cp2),
+                         ({Bfact: [bf1], Cfact: [cf2]}, {}))
+        self.assertEqual(fb.changes_since(cp1),
+                         ({Afact: [af2], Cfact: [cf1,cf2]}, {}))
+
+        # Changes made through delete queries and clear()
+        cp3 = fb.checkpoint()
+        fb.delete(Afact).where(Afact.num1 == 1).execute()
+        fb.clear()
+        fb.add(cf1)
+        self.assertEqual(fb.changes_since(cp3),
+                         ({}, {Afact: [af1, af2], Bfact: [bf1], Cfact: [cf2]}))
+        self.assertEqual(fb.changes_since(cp1),
+                         ({Cfact: [cf1]}, {Afact: [af1], Bfact: [bf1]}))
+
+        # Releasing a checkpoint invalidates earlier ones
+        fb.release_checkpoint(cp3)
+        self.assertEqual(fb.changes_since(cp3)[1][Bfact], [bf1])
+        with self.assertRaises(ValueError) as ctx:
+            fb.changes_since(cp1)
+
+        # Releasing a checkpoint with no later changes turns off tracking
+        cp4 = fb.checkpoint()
+        fb.release_checkpoint(cp4)
+        fb.add(af2)
+        with self.assertRaises(ValueError) as ctx:
+            fb.changes_since(cp4)
+        cp4 = fb.checkpoint()
+        fb.discard(af2)
+        self.assertEqual(fb.changes_since(cp4), ({}, {Afact: [af2]}))
+        with self.assertRaises(ValueError) as ctx:
+            fb.changes_since(cp3)
+
+        # A copy doesn't track changes
+        fb2 = fb.copy()
+        fb2.add(af1)
+        with self.assertRaises(ValueError) as ctx:
+            fb2.changes_since(cp3)
+        self.assertEqual(fb.changes_since(fb.checkpoint()), ({}, {}))
+
+    #--------------------------------------------------------------------------
+    # Test that the temporary copies made by comparisons and set operations
+    # don't cause the original to copy its data when it is next modified
+    #--------------------------------------------------------------------------
+    def test_temporary_copies(self):
+        Afact = self._Afact
+
+        af1 = Afact(num1=1, str1="1", str2="a")
+        af2 = Afact(num1=2, str1="1", str2="b")
+        af3 = Afact(num1=3, str1="1", str2="c")
+
+        fb = FactBase([af1,af2], indexes=[Afact.num1])
+        facts = fb._factmaps[Afact].facts()
+        self.assertTrue(fb == [af1,af2])
+        self.assertTrue(FrozenFactBase([af1,af2]) == fb)
+        self.assertEqual(len(FrozenFactBase([af3]).union(fb)), 3)
+        self.assertTrue(FactBase(fb) == fb)
+        fb.add(af3)
+        self.assertTrue(fb._factmaps[Afact].facts() is facts)
+
+        # A live copy is still protected
+        fb2 = FactBase(fb)
+        fb.remove(af3)
+        self.assertFalse(fb._factmaps[Afact].facts() is facts)
+        self.assertEqual(fb2, FactBase([af1,af2,af3]))
+
+    #--------------------------------------------------------------------------
+    # Test FrozenFactBase
+    #--------------------------------------------------------------------------
+    def test_frozenfactbase(self):
+        Afact = self._Afact
+        Bfact = self._Bfact
+
+        af1 = Afact(num1=1, str1="1", str2="a")
+        af2 = Afact(num1=2, str1="1", str2="b")
+        bf1 = Bfact(num1=1, str1="1", str2="a")
+
+        fb = FactBase([af1,af2,bf1], indexes=[Afact.num1])
+        ffb1 = fb.freeze()
+        ffb2 = FrozenFactBase([bf1,af2,af1])
+        ffb3 = FrozenFactBase(lambda: [af1,bf1])
+
+        # Hash is independent of order and equality matches FactBase equality
+        self.assertEqual(hash(ffb1), hash(ffb2))
+        self.assertEqual(ffb1, ffb2)
+        self.assertEqual(ffb1, fb)
+        self.assertEqual(fb, ffb1)
+        self.assertNotEqual(ffb1, ffb3)
+        self.assertEqual(ffb1.indexes, fb.indexes)
+        self.assertEqual(ffb1.freeze(), ffb1)
+        self.assertEqual(ffb1.copy(), ffb1)
+
+        d = { ffb1 : 1, ffb3 : 3 }
+        self.assertEqual(d[ffb2], 1)
+        self.assertEqual(d[FrozenFactBase([bf1,af1])], 3)
+        self.assertEqual(hash(FrozenFactBase()), hash(FrozenFactBase([])))
+
+        # Modifying the original doesn't change the frozen version
+        fb.add(Afact(num1=3, str1="1", str2="c"))
+        fb.discard(bf1)
+        self.assertEqual(ffb1, ffb2)
+        self.assertEqual(len(ffb1), 3)
+
+        # Cannot be modified
+        with self.assertRaises(TypeError) as ctx: ffb1.add(af1)
+        with self.assertRaises(TypeError) as ctx: ffb1.remove(af1)
+        with self.assertRaises(TypeError) as ctx: ffb1.clear()
+        with self.assertRaises(TypeError) as ctx: ffb1.delete(Afact)
+        with self.assertRaises(TypeError) as ctx: ffb1 |= [af1]
+
+        # Queries and set operations
+        q = ffb1.select(Afact).where(Afact.num1 > 1)
+        self.assertEqual(q.get(), [af2])
+        r = ffb1 - [bf1]
+        self.assertTrue(isinstance(r, FrozenFactBase))
+        self.assertEqual(r, FactBase([af1,af2]))
+        self.assertEqual(FactBase(ffb1), FactBase([af1,af2,bf1]))
+
     #--------------------------------------------------------------------------
     # Test the factbasehelper with double decorators
     #--------------------------------------------------------------------------
@@ -3064,6 +3523,49 @@ class FactBaseTestCase(unittest.TestCase):
         self.assertEqual(spu2.indexes, (Afact.num1,))
         self.assertEqual(spu3.indexes, ())
 
+    #--------------------------------------------------------------------------
+    # Test the symbolpredicateunifier with a cache of unified symbols
+    #--------------------------------------------------------------------------
+    def test_symbolpredicateunifier_cache(self):
+        class Afact(Predicate):
+            num1=IntegerField()
+        class Bfact(Predicate):
+            num1=IntegerField()
+
+        with self.assertRaises(ValueError) as ctx:
+            SymbolPredicateUnifier(predicates=[Afact], cache_size=-1)
+
+        spu = SymbolPredicateUnifier(predicates=[Afact], cache_size=3)
+        raws = [Function("afact",[Number(1)]), Function("afact",[Number(2)]),
+                Function("bfact",[Number(1)])]
+        fb1 = spu.unify(raws)
+        fb2 = spu.unify(raws[:2])
+        self.assertEqual(fb1, FactBase([Afact(1),Afact(2)]))
+        self.assertEqual(fb2, fb1)
+        self.assertEqual(len(spu._cache), 2)
+        self.assertFalse(raws[2] in spu._cache._entries)
+
+        # The same fact objects are returned for the cached symbols
+        af1 = list(fb1.select(Afact).where(Afact.num1 == 1).get())[0]
+        af2 = list(fb2.select(Afact).where(Afact.num1 == 1).get())[0]
+        self.assertTrue(af1 is af2)
+
+        # Symbols that don't match a predicate signature are not cached so
+        # they don't evict the cached facts
+        spu.unify([Function("aux",[Number(i)]) for i in range(5)])
+        self.assertEqual(set(spu._cache._entries.keys()), set(raws[:2]))
+
+        # The least recently used symbols are evicted
+        spu.unify([Function("afact",[Number(3)]), Function("afact",[Number(4)])])
+        self.assertEqual(len(spu._cache), 3)
+        self.assertFalse(raws[0] in spu._cache._entries)
+        self.assertTrue(raws[1] in spu._cache._entries)
+
+        # Registering a new predicate clears the cache
+        spu.register(Bfact)
+        self.assertEqual(len(spu._cache), 0)
+        self.assertEqual(spu.unify(raws), FactBase([Afact(1),Afact(2),Bfact(1)]))
+
     #--------------------------------------------------------------------------
     # Test the symbolpredicateunifier when there are subfields defined
     #--------------------------------------------------------------------------
@@ -3786,6 +4288,224 @@ class SelectTestCase(unittest.TestCase):
         self.assertTrue(set([f for f in s2.get(2,2)]), set([f2]))
         self.assertTrue(facts, set([f1,f2,f3]))
 
+    #--------------------------------------------------------------------------
+    #   Test that count() matches get() with and without using an index
+    #--------------------------------------------------------------------------
+    def test_factbase_select_count(self):
+        class Afact(Predicate):
+            num1=IntegerField()
+            num2=IntegerField()
+
+        facts = [ Afact(n1,n2) for n1 in range(1,5) for n2 in range(1,4) ]
+        fb1 = FactBase(facts, indexes=[Afact.num1])
+        fb2 = FactBase(facts)
+
+        self.assertEqual(fb1.select(Afact).count(), 12)
+        for fb in [fb1, fb2]:
+            s1 = fb.select(Afact).where(Afact.num1 == ph1_)
+            s2 = fb.select(Afact).where(Afact.num1 >= ph1_)
+            s3 = fb.select(Afact).where(Afact.num1 != ph1_)
+            s4 = fb.select(Afact).where(Afact.num1 < ph1_, Afact.num2 == 2)
+            for q in [s1,s2,s3,s4]:
+                for v in range(0,6):
+                    self.assertEqual(q.count(v), len(q.get(v)))
+            self.assertEqual(s1.count(2), 3)
+            self.assertEqual(s2.count(0), 12)
+            self.assertEqual(s3.count(2), 9)
+            self.assertEqual(s4.count(3), 2)
+
+        # An index only count must track changes to the fact base
+        s1 = fb1.select(Afact).where(Afact.num1 <= 2)
+        self.assertEqual(s1.count(), 6)
+        fb1.delete(Afact).where(Afact.num1 == 1, Afact.num2 == 1).execute()
+        self.assertEqual(s1.count(), 5)
+
+    #--------------------------------------------------------------------------
+    #   Test group_by and the aggregate functions with and without an index
+    #--------------------------------------------------------------------------
+    def test_factbase_select_group_by_and_aggregates(self):
+        class Afact(Predicate):
+            num1=IntegerField()
+            num2=IntegerField()
+
+        f11 = Afact(1,1) ; f12 = Afact(1,2) ; f13 = Afact(1,3)
+        f21 = Afact(2,1) ; f22 = Afact(2,2)
+        f35 = Afact(3,5)
+        facts = [f11,f12,f13,f21,f22,f35]
+        fb1 = FactBase(facts, indexes=[Afact.num1])
+        fb2 = FactBase(facts)
+
+        for fb in [fb1,fb2]:
+            # Aggregates without grouping
+            s1 = fb.select(Afact)
+            self.assertEqual(s1.sum(Afact.num2), 14)
+            self.assertEqual(s1.min(Afact.num1), 1)
+            self.assertEqual(s1.max(Afact.num1), 3)
+            self.assertEqual(s1.max(Afact.num2), 5)
+
+            s2 = fb.select(Afact).where(Afact.num1 >= ph1_)
+            self.assertEqual(s2.sum(Afact.num2, 2), 8)
+            self.assertEqual(s2.min(Afact.num1, 2), 2)
+            self.assertEqual(s2.max(Afact.num1, 2), 3)
+            self.assertEqual(s2.sum(Afact.num2, 4), 0)
+            with self.assertRaises(ValueError) as ctx:
+                s2.min(Afact.num1, 4)
+            with self.assertRaises(ValueError) as ctx:
+                s2.max(Afact.num2, 4)
+
+            s3 = fb.select(Afact).where(Afact.num1 != 2)
+            self.assertEqual(s3.min(Afact.num1), 1)
+            self.assertEqual(s3.max(Afact.num1), 3)
+
+            # Grouping
+            s4 = fb.select(Afact).group_by(Afact.num1)
+            self.assertEqual(s4.count(), {1: 3, 2: 2, 3: 1})
+            self.assertEqual(list(s4.count().keys()), [1,2,3])
+            self.assertEqual(s4.sum(Afact.num2), {1: 6, 2: 3, 3: 5})
+            self.assertEqual(s4.min(Afact.num2), {1: 1, 2: 1, 3: 5})
+            self.assertEqual(s4.max(Afact.num2), {1: 3, 2: 2, 3: 5})
+
+            s5 = fb.select(Afact).where(Afact.num1 < ph1_)\
+                                 .group_by(Afact.num1).order_by(desc(Afact.num2))
+            self.assertEqual(s5.get(3), {1: [f13,f12,f11], 2: [f22,f21]})
+            self.assertEqual(s5.count(2), {1: 3})
+
+            s6 = fb.select(Afact).where(Afact.num2 <= 2).group_by(Afact.num2)
+            self.assertEqual(s6.count(), {1: 2, 2: 2})
+            self.assertEqual(s6.sum(Afact.num1), {1: 3, 2: 3})
+
+            with self.assertRaises(TypeError) as ctx:
+                s6.get_unique()
+
+        # Bad group_by and aggregate statements
+        class Bfact(Predicate):
+            num1=IntegerField()
+
+        with self.assertRaises(TypeError) as ctx:
+            fb1.select(Afact).group_by(Afact.num1).group_by(Afact.num2)
+        check_errmsg("cannot specify 'group_by' multiple times", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb1.select(Afact).group_by(Bfact.num1)
+        check_errmsg("'group_by' expression contains path 'Bfact.num1'", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb1.select(Afact).sum(Bfact.num1)
+        check_errmsg("'sum' expression contains path 'Bfact.num1'", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb1.select(Afact).min(1)
+        check_errmsg("Invalid 'min' expression", ctx)
+
+    #--------------------------------------------------------------------------
+    #   Test projecting the query results
+    #--------------------------------------------------------------------------
+    def test_factbase_select_project(self):
+        class CT(ComplexTerm):
+            num1=IntegerField()
+            str1=StringField()
+        class Afact(Predicate):
+            num1=IntegerField()
+            ct=CT.Field()
+
+        f1 = Afact(1,CT(1,"a")) ; f2 = Afact(2,CT(2,"a"))
+        f3 = Afact(3,CT(3,"b")) ; f4 = Afact(3,CT(4,"b"), sign=False)
+        fb = FactBase([f1,f2,f3,f4], indexes=[Afact.num1])
+
+        s1 = fb.select(Afact).order_by(Afact.num1, Afact.ct.num1)\
+                             .project(Afact.num1, Afact.ct.str1)
+        self.assertEqual(s1.get(), [(1,"a"),(2,"a"),(3,"b"),(3,"b")])
+        self.assertEqual(s1.count(), 4)
+
+        s2 = fb.select(Afact).where(Afact.num1 >= ph1_).order_by(Afact.num1)\
+                             .project(Afact.ct.str1, distinct=True)
+        self.assertEqual(s2.get(1), [("a",),("b",)])
+        self.assertEqual(s2.count(1), 2)
+        self.assertEqual(s2.get_unique(3), ("b",))
+
+        s3 = fb.select(Afact).group_by(Afact.ct.str1)\
+                             .order_by(Afact.ct.num1).project(Afact.sign, Afact.ct)
+        self.assertEqual(s3.get(), {"a": [(True,CT(1,"a")),(True,CT(2,"a"))],
+                                    "b": [(True,CT(3,"b")),(False,CT(4,"b"))]})
+
+        s4 = fb.select(Afact).group_by(Afact.ct.str1).project(Afact.num1,distinct=True)
+        self.assertEqual(s4.count(), {"a": 2, "b": 1})
+
+        # Bad projections
+        with self.assertRaises(TypeError) as ctx:
+            fb.select(Afact).project()
+        check_errmsg("empty 'project' expression", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb.select(Afact).project(Afact.num1).project(Afact.num1)
+        check_errmsg("cannot specify 'project' multiple times", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb.select(Afact).project(CT.num1)
+        check_errmsg("'project' expression contains path 'CT.num1'", ctx)
+
+    #--------------------------------------------------------------------------
+    #   Test joining two predicates with and without indexes
+    #--------------------------------------------------------------------------
+    def test_factbase_join(self):
+        class Assign(Predicate):
+            person=ConstantField()
+            task=IntegerField()
+        class Task(Predicate):
+            id=IntegerField()
+            duration=IntegerField()
+
+        a1 = Assign("dave",1) ; a2 = Assign("morri",1) ; a3 = Assign("dave",2)
+        a4 = Assign("torsten",4)
+        t1 = Task(1,10) ; t2 = Task(2,20) ; t3 = Task(3,30)
+        facts = [a1,a2,a3,a4,t1,t2,t3]
+
+        fbs = [ FactBase(facts), FactBase(facts, indexes=[Task.id]),
+                FactBase(facts, indexes=[Assign.task]),
+                FactBase(facts, indexes=[Assign.task, Task.id]) ]
+        for fb in fbs:
+            j1 = fb.join(Assign,Task).on(Assign.task == Task.id)
+            self.assertEqual(set(j1.get()), set([(a1,t1),(a2,t1),(a3,t2)]))
+            self.assertEqual(j1.count(), 3)
+
+            # The join condition can be specified in either order
+            j2 = fb.join(Task,Assign).on(Assign.task == Task.id)
+            self.assertEqual(set(j2.get()), set([(t1,a1),(t1,a2),(t2,a3)]))
+
+            # Restrict the joined facts with placeholders
+            j3 = fb.join(Assign,Task).on(Assign.task == Task.id)\
+                                     .where(Assign.person == ph1_, Task.duration > ph2_)
+            self.assertEqual(set(j3.get("dave",0)), set([(a1,t1),(a3,t2)]))
+            self.assertEqual(j3.get("dave",15), [(a3,t2)])
+            self.assertEqual(j3.count("morri",15), 0)
+
+            # Join over multiple fields
+            j4 = fb.join(Assign,Task).on(Assign.task == Task.id,
+                                         Assign.task == Task.duration)
+            self.assertEqual(j4.get(), [])
+
+        # Bad join statements
+        fb = fbs[0]
+        class Other(Predicate):
+            id=IntegerField()
+
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Assign)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).get()
+        check_errmsg("missing 'on' expression", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).on(Assign.task < Task.id)
+        check_errmsg("Invalid 'on' expression", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).on(Assign.task == 1)
+        check_errmsg("Invalid 'on' expression", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).on(Assign.task == Other.id)
+        check_errmsg("'on' expression contains path 'Other.id'", ctx)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).on(Task.duration == Task.id)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).where(lambda x: True)
+        with self.assertRaises(TypeError) as ctx:
+            fb.join(Assign,Task).where((Assign.task == 1) | (Task.id == 1))
+        check_errmsg("Invalid 'where' expression", ctx)
+
     #--------------------------------------------------------------------------
     #   Test the delete
     #--------------------------------------------------------------------------
@@ -3826,6 +4546,31 @@ class SelectTestCase(unittest.TestCase):
         self.assertEqual(d1_num1.execute(4), 2)
         self.assertEqual(set([f for f in s1_num1.get(4)]), set([]))
 
+    #--------------------------------------------------------------------------
+    #   Test that a bulk delete keeps the indexes consistent
+    #--------------------------------------------------------------------------
+    def test_delete_maintains_indexes(self):
+        class Afact(Predicate):
+            num1=IntegerField()
+            num2=IntegerField()
+
+        facts = [ Afact(n1,n2) for n1 in range(0,10) for n2 in range(0,10) ]
+        fb = FactBase(facts, indexes=[Afact.num1, Afact.num2])
+
+        self.assertEqual(fb.delete(Afact).where(Afact.num1 < ph1_).execute(5), 50)
+        self.assertEqual(fb.delete(Afact).where(Afact.num2 == 3).execute(), 5)
+        self.assertEqual(fb.delete(Afact).where(lambda f: f.num2 > 7).execute(), 10)
+        self.assertEqual(len(fb), 35)
+
+        s1 = fb.select(Afact).where(Afact.num1 >= 0)
+        s2 = fb.select(Afact).where(Afact.num2 >= 0)
+        self.assertEqual(s1.count(), 35)
+        self.assertEqual(set(s2.get()), set(fb))
+        self.assertEqual(fb.select(Afact).min(Afact.num1), 5)
+        self.assertEqual(fb.select(Afact).max(Afact.num2), 7)
+        self.assertEqual(list(fb.select(Afact).group_by(Afact.num2).count().keys()),
+                         [0,1,2,4,5,6,7])
+
     #--------------------------------------------------------------------------
     # Test the support for indexes of subfields
     #--------------------------------------------------------------------------
@@ -115,6 +115,55 @@ class WrapperTestCase(unittest.TestCase):
         self.assertEqual(type(mypr.my_), My)
         self.assertEqual(mypr.num,5)
 
+    #--------------------------------------------------------------------------
+    # Test that member functions are bound to the wrapped object on first use
+    #--------------------------------------------------------------------------
+    def test_wrapper_bound_methods(self):
+
+        class My(object):
+            def __init__(self,num): self._num = num
+            def inc(self): self._num += 1
+            def __iter__(self): return iter(range(self._num))
+            @property
+            def num(self): return self._num
+
+        class MyWrapper(My,metaclass=WrapperMetaClass):
+            pass
+
+        my1=My(2)
+        my2=My(3)
+        mypr1=MyWrapper(wrapped_=my1)
+        mypr2=MyWrapper(wrapped_=my2)
+        self.assertEqual(MyWrapper.inc.__name__, "inc")
+        self.assertFalse("inc" in mypr1.__dict__)
+
+        # The bound method is cached per wrapper object
+        mypr1.inc()
+        self.assertEqual(mypr1.__dict__["inc"], my1.inc)
+        self.assertTrue(mypr1.inc is mypr1.inc)
+        mypr1.inc()
+        mypr2.inc()
+        self.assertEqual(mypr1.num, 4)
+        self.assertEqual(mypr2.num, 4)
+        self.assertEqual(my1.num, 4)
+
+        # Special methods are looked up through the type
+        self.assertEqual(list(mypr1), [0,1,2,3])
+
+        # Through the class the member function forwards to the wrapped object
+        self.assertTrue(callable(MyWrapper.inc))
+        MyWrapper.inc(mypr2)
+        self.assertEqual(my2.num, 5)
+
+        # Replacing the wrapped object drops the cached bound methods
+        my3=My(0)
+        mypr1._wrapped = my3
+        self.assertFalse("inc" in mypr1.__dict__)
+        mypr1.inc()
+        self.assertEqual(my3.num, 1)
+        self.assertEqual(my1.num, 4)
+        self.assertEqual(mypr1.num, 1)
+
     #--------------------------------------------------------------------------
     # Test that we can actually use an object of a different type instead of the
     # officially wrapped type. Allows a form of duck-typing.